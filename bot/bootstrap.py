@@ -0,0 +1,113 @@
+"""
+Сборка бота: сессия, диспетчер, фоновые задачи и запуск
+
+Общая для run.py и quick_start.py, чтобы точки входа не расходились
+в middleware и порядке их подключения.
+"""
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums.parse_mode import ParseMode
+
+from config_reader import config
+from database.activity import activity_buffer
+from database.catalog import reload_catalog
+from database.engine import close_db, init_db
+from handlers import admin_handlers, user_handlers
+from middlewares.database import DbSessionMiddleware, commit_before_request
+from middlewares.ordering import user_ordering
+from middlewares.throttling import throttling
+from services.broadcast import broadcaster
+from services.care_notifier import care_notifier
+from services.scheduler import Scheduler
+from services.sender import sender
+from services.stats_sweep import run_stats_sweep
+from services.webapp_api import cleanup_action_keys, start_api_server
+from services.webhook import run_webhook
+
+
+def create_bot(session: BaseSession = None) -> Bot:
+    """Бот с middleware исходящих запросов (session - своя сессия, например в тестах)"""
+    bot = Bot(
+        token=config.BOT_TOKEN.get_secret_value(),
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    # Запись апдейта коммитится до запроса к Telegram (и до очереди sender),
+    # чтобы единственное пишущее соединение не ждало сеть
+    bot.session.middleware(commit_before_request)
+    # Все исходящие запросы - через общий лимит Telegram с приоритетами
+    bot.session.middleware(sender)
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """Диспетчер с middleware, роутерами и фоновыми задачами"""
+    dp = Dispatcher()
+
+    # Лишние нажатия отсекаем сразу, до очереди пользователя и БД
+    dp.update.outer_middleware(throttling)
+
+    # Апдейты одного пользователя - строго по очереди
+    dp.update.outer_middleware(user_ordering)
+
+    # Одна сессия БД на апдейт
+    dp.message.middleware(DbSessionMiddleware())
+    dp.callback_query.middleware(DbSessionMiddleware())
+
+    # Подключаем роутеры (админы первые, чтобы их фильтр сработал раньше)
+    dp.include_router(admin_handlers.router)
+    dp.include_router(user_handlers.router)
+
+    # Фоновые задачи
+    scheduler = Scheduler()
+    if config.STATS_SWEEP_INTERVAL:
+        scheduler.add_job(
+            lambda: run_stats_sweep(config.STATS_SWEEP_CHUNK),
+            config.STATS_SWEEP_INTERVAL,
+            name='stats_sweep'
+        )
+    scheduler.add_job(activity_buffer.flush, config.ACTIVITY_FLUSH_INTERVAL, name='activity_flush')
+    if config.WEBAPP_API:
+        # Ключи идемпотентности действий Mini App нужны только для повторов
+        scheduler.add_job(cleanup_action_keys, 3600, name='webapp_actions_cleanup')
+    dp.startup.register(scheduler.start)
+    dp.shutdown.register(scheduler.stop)
+    dp.shutdown.register(activity_buffer.flush)
+
+    # Рассылки, прерванные остановкой бота, продолжаются с сохранённого курсора
+    dp.startup.register(broadcaster.resume)
+    dp.shutdown.register(broadcaster.stop)
+
+    # Напоминания владельцам: планировщик просыпается только к наступившим срокам
+    dp.startup.register(care_notifier.start)
+    dp.shutdown.register(care_notifier.stop)
+    return dp
+
+
+async def prepare():
+    """Миграции БД и справочник предметов - до создания бота"""
+    await init_db()
+    await reload_catalog()
+
+
+async def run_bot(bot: Bot, dp: Dispatcher):
+    """Работать в режиме RUN_MODE до остановки; закрывает сессию бота и БД"""
+    # API для Mini App: при вебхуке он на том же сервере, при polling - на своём порту
+    api_runner = None
+    if config.WEBAPP_API and config.RUN_MODE != 'webhook':
+        api_runner = await start_api_server()
+
+    try:
+        if config.RUN_MODE == 'webhook':
+            # Вебхук: Telegram сам присылает апдейты на наш сервер
+            await run_webhook(dp, bot)
+        else:
+            # Polling: старые апдейты выбрасываем, только если DROP_PENDING_UPDATES
+            await bot.delete_webhook(drop_pending_updates=config.DROP_PENDING_UPDATES)
+            await dp.start_polling(bot)
+    finally:
+        if api_runner:
+            await api_runner.cleanup()
+        await bot.session.close()
+        await close_db()
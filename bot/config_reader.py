@@ -1,4 +1,6 @@
-from pydantic import SecretStr
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,8 +10,100 @@ class Settings(BaseSettings):
     LOG_LEVEL: str
     ADMIN_IDS: str
 
+    # Соединения с БД: SQLite пишет только одним соединением за раз,
+    # поэтому у записи своё соединение, а чтение идёт через пул только для чтения
+    DB_WRITER_POOL_SIZE: int = 1
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_ECHO: bool = False
+
+    # Профиль SQLite (PRAGMA на каждое соединение)
+    SQLITE_JOURNAL_MODE: str = 'WAL'
+    SQLITE_SYNCHRONOUS: str = 'NORMAL'
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # байты
+    SQLITE_CACHE_SIZE: int = -64000  # отрицательное - в КиБ
+    SQLITE_BUSY_TIMEOUT: int = 5000  # мс
+    SQLITE_TEMP_STORE: str = 'MEMORY'
+
+    # Фоновая запись снижения статов (0 - выключить)
+    STATS_SWEEP_INTERVAL: int = 3600
+    STATS_SWEEP_CHUNK: int = 500
+
+    # Как часто сбрасывать в БД активность пользователей (секунды)
+    ACTIVITY_FLUSH_INTERVAL: float = 5.0
+
+    # Кэш состояния игроков (пользователь + питомец)
+    STATE_CACHE_SIZE: int = 10000
+    STATE_CACHE_TTL: float = 300.0
+
+    # Апдейты одного пользователя - по очереди, разных - параллельно
+    UPDATE_SHARDS: int = 64
+    USER_QUEUE_LIMIT: int = 10  # Сколько апдейтов пользователя может ждать
+
+    # Частота нажатий: callback_data (или её начало) -> (токенов в секунду, запас)
+    THROTTLE_LIMITS: Dict[str, Tuple[float, int]] = {
+        'quick_feed': (0.5, 3),
+        'quick_play': (0.5, 3),
+    }
+    THROTTLE_CACHE_SIZE: int = 50000
+
+    # Отпечатки последних правок сообщений (чтобы не слать одинаковые edit_text)
+    EDIT_CACHE_SIZE: int = 10000
+    EDIT_CACHE_TTL: float = 86400.0
+
+    # Исходящие запросы: общий лимит в секунду, пауза между сообщениями в один чат
+    SEND_RATE: float = 30.0
+    SEND_CHAT_INTERVAL: float = 1.0
+    SEND_MAX_RETRIES: int = 3
+
+    # Рассылки: получателей на страницу (и на сохранение курсора), отправок одновременно,
+    # как часто обновлять отчёт админу (секунды)
+    BROADCAST_BATCH_SIZE: int = 500
+    BROADCAST_CONCURRENCY: int = 25
+    BROADCAST_REPORT_INTERVAL: float = 10.0
+
+    # Напоминания о питомце: когда здоровье или настроение опустится до порога
+    CARE_NOTIFY_THRESHOLD: float = 25.0
+    CARE_NOTIFY_BATCH: int = 100
+    CARE_MAX_SLEEP: float = 300.0  # Самый долгий сон планировщика (секунды)
+
+    # Режим работы: polling или webhook
+    RUN_MODE: str = 'polling'
+    # Выбросить накопившиеся апдейты при старте (иначе обработать после перезапуска)
+    DROP_PENDING_UPDATES: bool = False
+
+    # Вебхук (RUN_MODE=webhook)
+    WEBHOOK_URL: str = ''  # Публичный адрес, например https://bot.example.com
+    WEBHOOK_PATH: str = '/webhook'
+    WEBHOOK_SECRET: Optional[SecretStr] = None  # Обязателен: без него вебхук примет чужой POST
+    WEBHOOK_HOST: str = '0.0.0.0'
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_MAX_CONCURRENCY: int = 40
+
+    # API для Mini App: в режиме webhook - на том же сервере (/api/), иначе - на своём порту
+    WEBAPP_API: bool = False
+    WEBAPP_API_HOST: str = '0.0.0.0'
+    WEBAPP_API_PORT: int = 8081
+    WEBAPP_AUTH_MAX_AGE: int = 86400  # Сколько секунд действует initData (0 - без ограничения)
+    WEBAPP_AUTH_CACHE_SIZE: int = 10000
+    WEBAPP_CORS_ORIGINS: List[str] = ['https://lovestove.github.io']
+    # Пачка действий: сколько в одном запросе, допустимое расхождение часов клиента
+    # и возраст действия (секунды), сколько помнить ключи идемпотентности
+    WEBAPP_MAX_BATCH: int = 50
+    WEBAPP_ACTION_MAX_SKEW: float = 60.0
+    WEBAPP_ACTION_MAX_AGE: float = 3600.0
+    WEBAPP_ACTION_KEY_TTL: int = 7 * 86400
+
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
 
+    @model_validator(mode='after')
+    def _require_webhook_secret(self):
+        # Без secret_token вебхук примет апдейт от кого угодно, кто знает адрес
+        if self.RUN_MODE == 'webhook' and not (self.WEBHOOK_SECRET and self.WEBHOOK_SECRET.get_secret_value()):
+            raise ValueError('WEBHOOK_SECRET обязателен при RUN_MODE=webhook')
+        return self
+
 config = Settings()
 
-admin_list = [int(admin) for admin in config.ADMIN_IDS.split(',')]
\ No newline at end of file
+admin_list = [int(admin) for admin in config.ADMIN_IDS.split(',')]
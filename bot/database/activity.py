@@ -0,0 +1,74 @@
+"""
+Отложенная запись активности пользователей
+
+last_active, last_login_date и login_streak меняются на каждом апдейте, но
+нужны только для статистики. Поэтому они копятся в памяти и пишутся в БД
+одним пакетным UPDATE раз в несколько секунд и при остановке бота.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import update
+
+from . import rules
+from .engine import async_session
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """Несохранённая активность пользователей по telegram_id"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def touch(self, user, now: datetime = None) -> dict:
+        """Отметить заход пользователя и пересчитать стрик логинов
+
+        user - объект User или его снимок. Возвращает новые значения
+        last_active, last_login_date и login_streak.
+        """
+        now = now or datetime.now()
+        entry = self._pending.get(user.telegram_id)
+        last_login_date = entry['last_login_date'] if entry else user.last_login_date
+        login_streak = entry['login_streak'] if entry else user.login_streak
+
+        login_streak = rules.login_streak(last_login_date, login_streak, now)
+
+        self._pending[user.telegram_id] = {
+            'id': user.id,
+            'last_active': now,
+            'last_login_date': now,
+            'login_streak': login_streak,
+        }
+        return {
+            'last_active': now,
+            'last_login_date': now,
+            'login_streak': login_streak,
+        }
+
+    async def flush(self):
+        """Записать накопленную активность одним пакетом"""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        try:
+            async with async_session() as db:
+                await db.execute(update(User), list(batch.values()))
+                await db.commit()
+        except Exception:
+            # Возвращаем в буфер всё, что не успело обновиться заново
+            for telegram_id, entry in batch.items():
+                self._pending.setdefault(telegram_id, entry)
+            raise
+
+        logger.debug('Записана активность %d пользователей', len(batch))
+        return len(batch)
+
+
+activity_buffer = ActivityBuffer()
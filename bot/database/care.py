@@ -0,0 +1,59 @@
+"""
+Срок напоминания о питомце
+
+pets.care_due_at - момент, когда здоровье или настроение питомца опустится
+до CARE_NOTIFY_THRESHOLD, если о нём не заботиться. Срок считается по формуле
+снижения (decay.stat_reaches) и пересчитывается перед flush каждый раз, когда
+у питомца меняются статы или время последнего ухода - из любого места кода.
+По индексу на care_due_at планировщик (services/care_notifier.py) берёт
+только тех, кому уже пора, не обходя таблицу.
+
+NULL - напоминать не нужно: уже напомнили (до следующего ухода) или стат
+не опустится до порога.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config_reader import config
+from .decay import DECAY_RULES, stat_reaches
+from .models import Pet
+
+# Статы, о падении которых напоминаем
+CARE_RULES = tuple(rule for rule in DECAY_RULES if rule.stat in ('health', 'happiness'))
+
+# Поля, от которых зависит срок
+_CARE_FIELDS = tuple({'stats_updated_at'} | {rule.stat for rule in CARE_RULES} | {rule.clock for rule in CARE_RULES})
+
+
+def care_due_at(pet, now: datetime = None, threshold: float = None):
+    """Ближайший момент, когда стат из CARE_RULES опустится до порога (или None)"""
+    threshold = config.CARE_NOTIFY_THRESHOLD if threshold is None else threshold
+    deadlines = [
+        deadline for deadline in (stat_reaches(pet, rule, threshold, now) for rule in CARE_RULES)
+        if deadline is not None
+    ]
+    return min(deadlines, default=None)
+
+
+def low_stats(pet, threshold: float = None) -> list:
+    """Статы из CARE_RULES, которые уже не выше порога (статы pet должны быть актуальны)"""
+    threshold = config.CARE_NOTIFY_THRESHOLD if threshold is None else threshold
+    return [rule.stat for rule in CARE_RULES if getattr(pet, rule.stat) <= threshold]
+
+
+def _care_changed(pet) -> bool:
+    attrs = inspect(pet).attrs
+    return any(attrs[field].history.has_changes() for field in _CARE_FIELDS)
+
+
+@event.listens_for(Session, 'before_flush')
+def _update_care_deadlines(session, flush_context, instances):
+    now = datetime.now()
+    for obj in session.new:
+        if isinstance(obj, Pet):
+            obj.care_due_at = care_due_at(obj, now)
+    for obj in session.dirty:
+        if isinstance(obj, Pet) and _care_changed(obj):
+            obj.care_due_at = care_due_at(obj, now)
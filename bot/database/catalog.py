@@ -0,0 +1,97 @@
+"""
+Справочник предметов в памяти
+
+Таблица items - статичные данные (см. init_data.py), поэтому она читается
+один раз при старте и дальше используется как неизменяемый индекс:
+по ID, по типу и по редкости, с уже разобранным JSON stat_bonus.
+"""
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import select
+
+from .engine import read_session
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+ItemView = namedtuple('ItemView', [
+    'id', 'name', 'description', 'item_type', 'rarity',
+    'health_effect', 'happiness_effect', 'intelligence_effect', 'energy_effect',
+    'stat_bonus', 'coin_price', 'crystal_price', 'icon_emoji', 'image_url',
+])
+
+
+def _item_view(item: Item) -> ItemView:
+    values = {field: getattr(item, field) for field in ItemView._fields}
+    values['stat_bonus'] = MappingProxyType(json.loads(item.stat_bonus) if item.stat_bonus else {})
+    return ItemView(**values)
+
+
+def _group(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(getattr(item, key), []).append(item)
+    return MappingProxyType({value: tuple(group) for value, group in groups.items()})
+
+
+class ItemCatalog:
+    """Неизменяемый индекс предметов"""
+
+    def __init__(self, items=()):
+        self.items = tuple(sorted(items, key=lambda item: item.id))
+        self.by_id = MappingProxyType({item.id: item for item in self.items})
+        self.by_type = _group(self.items, 'item_type')
+        self.by_rarity = _group(self.items, 'rarity')
+
+        # Версия - хэш содержимого: меняется, только если поменялись сами предметы
+        content = repr([tuple(item._replace(stat_bonus=dict(item.stat_bonus))) for item in self.items])
+        self.version = hashlib.sha1(content.encode()).hexdigest()[:12]
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, item_id: int):
+        """Предмет по ID (или None)"""
+        return self.by_id.get(item_id)
+
+    def of_type(self, item_type: str = None):
+        """Все предметы или предметы одного типа"""
+        if item_type is None:
+            return self.items
+        return self.by_type.get(item_type, ())
+
+    def of_rarity(self, rarity: str):
+        return self.by_rarity.get(rarity, ())
+
+    def find(self, name: str):
+        """Первый предмет с таким названием (или None)"""
+        for item in self.items:
+            if item.name == name:
+                return item
+        return None
+
+
+_catalog = ItemCatalog()
+
+
+def get_catalog() -> ItemCatalog:
+    """Текущий справочник предметов"""
+    return _catalog
+
+
+async def reload_catalog() -> bool:
+    """Перечитать справочник из БД; True, если версия изменилась"""
+    global _catalog
+
+    async with read_session() as db:
+        result = await db.execute(select(Item))
+        catalog = ItemCatalog(_item_view(item) for item in result.scalars().all())
+
+    changed = catalog.version != _catalog.version
+    _catalog = catalog
+    logger.info('📦 Справочник предметов: %d шт., версия %s', len(catalog), catalog.version)
+    return changed
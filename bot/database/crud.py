@@ -1,61 +1,140 @@
 """
 CRUD операции для работы с базой данных
+
+Функции не коммитят сами: одна сессия и один commit на апдейт
+(см. middlewares/database.py). Где нужен ID новой записи - делаем flush.
 """
-from sqlalchemy.orm import Session
-from .models import User, Pet, Item, UserItem, PetSkill
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
+from .models import User, Pet, Item, UserItem, PetSkill, Broadcast, WebAppAction
+from . import care  # noqa: F401 - пересчёт pets.care_due_at перед flush
+from . import ledger
+from .activity import activity_buffer
+from .catalog import ItemView, get_catalog
+from .decay import refresh_stats, settle_stats, sql_decay_values
+from . import rules
+from .state_cache import (
+    PetSnapshot, PlayerState, UserSnapshot, is_user_changed, mark_user_changed, snapshot, state_cache
+)
+from collections import namedtuple
+import json
 from datetime import datetime, timedelta
 import random
 
 
 # === ПОЛЬЗОВАТЕЛИ ===
 
-def get_or_create_user(db: Session, telegram_id: int, username: str = None, first_name: str = None):
+async def get_user(db: AsyncSession, telegram_id: int):
+    """Найти пользователя по telegram_id (или None); ничего не пишет в БД"""
+    result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+    user = result.scalars().first()
+
+    if user:
+        # Активность и стрик логинов пишутся в БД пачкой (см. activity.py),
+        # поэтому подставляем их как уже сохранённые
+        for key, value in activity_buffer.touch(user).items():
+            set_committed_value(user, key, value)
+
+    return user
+
+
+async def get_or_create_user(db: AsyncSession, telegram_id: int, username: str = None, first_name: str = None):
     """Получить пользователя или создать нового"""
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    user = await get_user(db, telegram_id)
 
     if not user:
         user = User(
             telegram_id=telegram_id,
             username=username,
             first_name=first_name,
-            coins=100,
-            crystals=10  # Стартовый бонус
+            coins=rules.STARTER_COINS,
+            crystals=rules.STARTER_CRYSTALS  # Стартовый бонус
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.flush()
+        mark_user_changed(db, user.id)
+
+    return user
+
+
+async def get_player(db: AsyncSession, telegram_id: int, username: str = None, first_name: str = None,
+                     create: bool = True):
+    """Пользователь и его первый питомец (или None)
+
+    Возвращает снимки из state_cache, если с последнего чтения ничего не
+    менялось - тогда к БД не обращаемся вовсе. С create=False незнакомый
+    пользователь не создаётся (PlayerState(None, None)) - так можно читать
+    из сессии только на чтение.
+    """
+    state = state_cache.get(telegram_id)
+    if state is not None:
+        user = state.user._replace(**activity_buffer.touch(state.user))
+        state = state._replace(user=user)
+        state_cache.put(state)
+        return state
+
+    if create:
+        user = await get_or_create_user(db, telegram_id, username, first_name)
     else:
-        # Обновляем last_active
-        user.last_active = datetime.now()
+        user = await get_user(db, telegram_id)
+        if not user:
+            return PlayerState(user=None, pet=None)
+
+    pets = await get_user_pets(db, user.id)
+    state = PlayerState(
+        user=snapshot(UserSnapshot, user),
+        pet=snapshot(PetSnapshot, pets[0]) if pets else None
+    )
+    if not is_user_changed(db, user.id):
+        # Снимок отбросится, если пользователя сбросили после начала транзакции
+        state_cache.put(state, since=db.info.get('state_generation'))
+    return state
 
-        # Проверяем стрик логинов
-        if user.last_login_date:
-            days_diff = (datetime.now().date() - user.last_login_date.date()).days
-            if days_diff == 1:
-                user.login_streak += 1
-            elif days_diff > 1:
-                user.login_streak = 1
 
-        user.last_login_date = datetime.now()
-        db.commit()
+async def update_user_currency(db: AsyncSession, user_id: int, coins: int = 0, crystals: int = 0,
+                               reason: str = None, allow_overdraft: bool = False):
+    """Изменить валюту пользователя
 
-    return user
+    Один UPDATE ... RETURNING без чтения в Python, поэтому параллельные
+    награды и покупки не теряют друг друга. Если средств не хватает (и
+    allow_overdraft=False) или пользователя нет - возвращает None,
+    иначе новый баланс (coins, crystals). Нулевое изменение ничего не пишет
+    (ни UPDATE, ни строки в журнале) и возвращает текущий баланс.
+    """
+    if not coins and not crystals:
+        return (await db.execute(select(User.coins, User.crystals).where(User.id == user_id))).first()
+
+    stmt = update(User).where(User.id == user_id)
+    if not allow_overdraft:
+        stmt = stmt.where(User.coins + coins >= 0, User.crystals + crystals >= 0)
+    stmt = (
+        stmt.values(coins=User.coins + coins, crystals=User.crystals + crystals)
+        .returning(User.coins, User.crystals)
+        .execution_options(synchronize_session=False)
+    )
+    balance = (await db.execute(stmt)).first()
+    if balance is None:
+        return None
 
+    # Объект пользователя в этой сессии (если загружен) видит новый баланс
+    user = db.identity_map.get(identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, 'coins', balance.coins)
+        set_committed_value(user, 'crystals', balance.crystals)
 
-def update_user_currency(db: Session, user_id: int, coins: int = 0, crystals: int = 0):
-    """Обновить валюту пользователя"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.coins += coins
-        user.crystals += crystals
-        db.commit()
-    return user
+    ledger.record(db, user_id, coins, crystals, reason)
+    mark_user_changed(db, user_id)
+    return balance
 
 
 # === ПИТОМЦЫ ===
 
-def create_pet(db: Session, owner_id: int, name: str, species: str, personality: str,
-               color: str = 'blue', pattern: str = 'solid'):
+async def create_pet(db: AsyncSession, owner_id: int, name: str, species: str, personality: str,
+                     color: str = 'blue', pattern: str = 'solid'):
     """Создать нового питомца"""
     pet = Pet(
         owner_id=owner_id,
@@ -64,210 +143,234 @@ def create_pet(db: Session, owner_id: int, name: str, species: str, personality:
         personality=personality,
         color=color,
         pattern=pattern,
-        health=100,
-        happiness=100,
-        intelligence=50,
-        energy=100
+        **rules.STARTER_PET_STATS
     )
     db.add(pet)
-    db.commit()
-    db.refresh(pet)
+    await db.flush()
+    mark_user_changed(db, owner_id)
     return pet
 
 
-def get_user_pets(db: Session, user_id: int):
+async def get_user_pets(db: AsyncSession, user_id: int):
     """Получить всех питомцев пользователя"""
-    return db.query(Pet).filter(Pet.owner_id == user_id).all()
+    result = await db.execute(select(Pet).where(Pet.owner_id == user_id))
+    pets = result.scalars().all()
+    now = datetime.now()
+    for pet in pets:
+        refresh_stats(pet, now)
+    return pets
 
 
-def get_pet_by_id(db: Session, pet_id: int):
+async def get_pet_by_id(db: AsyncSession, pet_id: int):
     """Получить питомца по ID"""
-    return db.query(Pet).filter(Pet.id == pet_id).first()
+    pet = await db.get(Pet, pet_id)
+    if pet:
+        refresh_stats(pet)
+    return pet
 
 
-def update_pet_stats(db: Session, pet_id: int, **stats):
+async def update_pet_stats(db: AsyncSession, pet_id: int, **stats):
     """Обновить статы питомца
 
-    Пример: update_pet_stats(db, pet_id, health=+10, happiness=+20)
+    Пример: await update_pet_stats(db, pet_id, health=+10, happiness=+20)
     """
-    pet = get_pet_by_id(db, pet_id)
+    pet = await get_pet_by_id(db, pet_id)
     if not pet:
         return None
 
-    # Обновляем статы и следим чтобы были в диапазоне 0-100
-    if 'health' in stats:
-        pet.health = max(0, min(100, pet.health + stats['health']))
-    if 'happiness' in stats:
-        pet.happiness = max(0, min(100, pet.happiness + stats['happiness']))
-    if 'intelligence' in stats:
-        pet.intelligence = max(0, min(100, pet.intelligence + stats['intelligence']))
-    if 'energy' in stats:
-        pet.energy = max(0, min(100, pet.energy + stats['energy']))
-
-    db.commit()
-    db.refresh(pet)
-    return pet
+    settle_stats(pet)
+    mark_user_changed(db, pet.owner_id)
+
+    return rules.apply_stats(pet, **stats)
 
 
-def feed_pet(db: Session, pet_id: int, food_item: Item):
+async def feed_pet(db: AsyncSession, pet_id: int, food_item: ItemView):
     """Покормить питомца"""
-    pet = get_pet_by_id(db, pet_id)
+    pet = await get_pet_by_id(db, pet_id)
     if not pet:
         return None
 
-    # Применяем эффекты еды
-    pet.health = min(100, pet.health + food_item.health_effect)
-    pet.happiness = min(100, pet.happiness + food_item.happiness_effect)
-    pet.energy = min(100, pet.energy + food_item.energy_effect)
-    pet.intelligence = min(100, pet.intelligence + food_item.intelligence_effect)
+    settle_stats(pet)
+    mark_user_changed(db, pet.owner_id)
 
-    pet.last_fed = datetime.now()
+    return rules.apply_food(pet, food_item, datetime.now())
 
-    db.commit()
-    db.refresh(pet)
-    return pet
 
-
-def add_pet_xp(db: Session, pet_id: int, xp_amount: int):
+async def add_pet_xp(db: AsyncSession, pet_id: int, xp_amount: int):
     """Добавить опыт питомцу и проверить повышение уровня"""
-    pet = get_pet_by_id(db, pet_id)
+    pet = await get_pet_by_id(db, pet_id)
     if not pet:
         return None
 
-    pet.xp += xp_amount
+    mark_user_changed(db, pet.owner_id)
+    leveled_up = rules.apply_xp(pet, xp_amount)
+    return {'pet': pet, 'leveled_up': leveled_up}
 
-    # Формула для levelup: нужно level * 100 XP для следующего уровня
-    xp_needed = pet.level * 100
 
-    leveled_up = False
-    while pet.xp >= xp_needed:
-        pet.xp -= xp_needed
-        pet.level += 1
-        leveled_up = True
-        xp_needed = pet.level * 100
+def check_evolution(pet: Pet):
+    """Проверить и применить эволюцию"""
+    rules.apply_evolution(pet)
 
-        # Проверяем эволюцию
-        check_evolution(db, pet)
 
-    db.commit()
-    db.refresh(pet)
+async def play_with_pet(db: AsyncSession, pet_id: int, game_type: str = 'simple'):
+    """Играть с питомцем"""
+    pet = await get_pet_by_id(db, pet_id)
+    if not pet:
+        return None
 
-    return {'pet': pet, 'leveled_up': leveled_up}
+    settle_stats(pet)
+    mark_user_changed(db, pet.owner_id)
 
+    return rules.apply_play(pet, random.randint(*rules.PLAY_XP), datetime.now())
 
-def check_evolution(db: Session, pet: Pet):
-    """Проверить и применить эволюцию"""
-    evolution_levels = [5, 15, 30, 50, 75]
 
-    if pet.level in evolution_levels:
-        new_stage = evolution_levels.index(pet.level) + 1
-        if new_stage > pet.evolution_stage:
-            pet.evolution_stage = new_stage
-            # Здесь можно добавить логику изменения внешнего вида
+async def rest_pet(db: AsyncSession, pet_id: int):
+    """Дать питомцу отдохнуть"""
+    pet = await get_pet_by_id(db, pet_id)
+    if not pet:
+        return None
 
-    db.commit()
+    settle_stats(pet)
+    mark_user_changed(db, pet.owner_id)
 
+    return rules.apply_rest(pet, datetime.now())
 
-def play_with_pet(db: Session, pet_id: int, game_type: str = 'simple'):
-    """Играть с питомцем"""
-    pet = get_pet_by_id(db, pet_id)
-    if not pet:
-        return None
 
-    # Проверяем энергию
-    if pet.energy < 10:
-        return {'success': False, 'message': 'Питомец слишком устал! Дай ему отдохнуть 😴'}
+# === ПРЕДМЕТЫ ===
 
-    # Тратим энергию
-    pet.energy = max(0, pet.energy - 10)
+async def get_item_by_id(db: AsyncSession, item_id: int):
+    """Получить предмет по ID (из справочника в памяти, см. catalog.py)"""
+    return get_catalog().get(item_id)
 
-    # Повышаем счастье и даем XP
-    pet.happiness = min(100, pet.happiness + 15)
-    pet.total_games_played += 1
-    pet.last_played = datetime.now()
 
-    xp_gained = random.randint(20, 50)
-    result = add_pet_xp(db, pet_id, xp_gained)
+async def get_all_items(db: AsyncSession, item_type: str = None):
+    """Получить все предметы (опционально по типу)"""
+    return list(get_catalog().of_type(item_type))
 
-    db.commit()
 
-    return {
-        'success': True,
-        'message': 'Отлично поиграли! 🎮',
-        'xp_gained': xp_gained,
-        'leveled_up': result['leveled_up']
-    }
+# Стартовый набор нового игрока: название предмета -> количество
+STARTER_ITEMS = {'Хлеб': 3}
 
 
-def rest_pet(db: Session, pet_id: int):
-    """Дать питомцу отдохнуть"""
-    pet = get_pet_by_id(db, pet_id)
-    if not pet:
-        return None
+def _upsert_user_items():
+    """INSERT в инвентарь, который при повторе (user_id, item_id) добавляет количество"""
+    stmt = sqlite_insert(UserItem)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserItem.user_id, UserItem.item_id],
+        set_={'quantity': UserItem.quantity + stmt.excluded.quantity}
+    )
 
-    # Восстанавливаем энергию
-    pet.energy = min(100, pet.energy + 30)
-    pet.last_sleep = datetime.now()
 
-    db.commit()
-    db.refresh(pet)
-    return pet
+async def add_item_to_user(db: AsyncSession, user_id: int, item_id: int, quantity: int = 1):
+    """Добавить предмет в инвентарь пользователя"""
+    stmt = (
+        _upsert_user_items()
+        .values(user_id=user_id, item_id=item_id, quantity=quantity, obtained_at=datetime.now())
+        .returning(UserItem)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
 
 
-# === ПРЕДМЕТЫ ===
+async def add_items_to_user(db: AsyncSession, user_id: int, items: dict):
+    """Добавить пользователю несколько предметов одним запросом
 
-def get_item_by_id(db: Session, item_id: int):
-    """Получить предмет по ID"""
-    return db.query(Item).filter(Item.id == item_id).first()
+    Пример: await add_items_to_user(db, user_id, {bread_id: 3, water_id: 1})
+    """
+    return await grant_items(db, {user_id: items})
 
 
-def get_all_items(db: Session, item_type: str = None):
-    """Получить все предметы (опционально по типу)"""
-    query = db.query(Item)
+async def grant_items(db: AsyncSession, grants: dict):
+    """Выдать предметы сразу многим пользователям: {user_id: {item_id: quantity}}
+
+    Один пакетный INSERT ... ON CONFLICT DO UPDATE. Возвращает число строк.
+    """
+    now = datetime.now()
+    rows = [
+        {'user_id': user_id, 'item_id': item_id, 'quantity': quantity, 'obtained_at': now}
+        for user_id, items in grants.items()
+        for item_id, quantity in items.items()
+        if quantity > 0
+    ]
+    if rows:
+        await db.execute(_upsert_user_items(), rows)
+    return len(rows)
+
+
+async def give_starter_items(db: AsyncSession, user_id: int):
+    """Выдать стартовый набор (STARTER_ITEMS)"""
+    catalog = get_catalog()
+    items = {}
+    for name, quantity in STARTER_ITEMS.items():
+        item = catalog.find(name)
+        if item:
+            items[item.id] = quantity
+    return await add_items_to_user(db, user_id, items)
+
+
+# Строка инвентаря для отображения: данные предмета и количество, без ORM-объектов
+InventoryRow = namedtuple('InventoryRow', [
+    'item_id', 'name', 'icon_emoji', 'item_type', 'rarity', 'quantity',
+    'health_effect', 'happiness_effect', 'intelligence_effect', 'energy_effect',
+])
+
+
+async def get_user_inventory(db: AsyncSession, user_id: int, item_type: str = None):
+    """Получить инвентарь пользователя (UserItem с подгруженным .item) одним запросом"""
+    query = (
+        select(UserItem)
+        .join(UserItem.item)
+        .where(UserItem.user_id == user_id)
+        .options(contains_eager(UserItem.item))
+    )
+
     if item_type:
-        query = query.filter(Item.item_type == item_type)
-    return query.all()
+        query = query.where(Item.item_type == item_type)
 
+    result = await db.execute(query)
+    return result.scalars().all()
 
-def add_item_to_user(db: Session, user_id: int, item_id: int, quantity: int = 1):
-    """Добавить предмет в инвентарь пользователя"""
-    # Проверяем, есть ли уже такой предмет
-    user_item = db.query(UserItem).filter(
-        UserItem.user_id == user_id,
-        UserItem.item_id == item_id
-    ).first()
 
-    if user_item:
-        user_item.quantity += quantity
-    else:
-        user_item = UserItem(
-            user_id=user_id,
-            item_id=item_id,
-            quantity=quantity
+def inventory_rows_query(user_id: int, item_type: str = None, after_id: int = None, limit: int = None):
+    """Запрос строк инвентаря: JOIN с items, порядок и курсор - по item_id"""
+    query = (
+        select(
+            UserItem.item_id, Item.name, Item.icon_emoji, Item.item_type, Item.rarity, UserItem.quantity,
+            Item.health_effect, Item.happiness_effect, Item.intelligence_effect, Item.energy_effect,
         )
-        db.add(user_item)
+        .join(Item, Item.id == UserItem.item_id)
+        .where(UserItem.user_id == user_id, UserItem.quantity > 0)
+        .order_by(UserItem.item_id)
+    )
 
-    db.commit()
-    db.refresh(user_item)
-    return user_item
+    if item_type:
+        query = query.where(Item.item_type == item_type)
+    if after_id is not None:
+        query = query.where(UserItem.item_id > after_id)
+    if limit:
+        query = query.limit(limit)
 
+    return query
 
-def get_user_inventory(db: Session, user_id: int, item_type: str = None):
-    """Получить инвентарь пользователя"""
-    query = db.query(UserItem).filter(UserItem.user_id == user_id)
 
-    if item_type:
-        query = query.join(Item).filter(Item.item_type == item_type)
+async def get_inventory_rows(db: AsyncSession, user_id: int, item_type: str = None,
+                             after_id: int = None, limit: int = None):
+    """Инвентарь пользователя списком InventoryRow - всегда один запрос
 
-    return query.all()
+    Постраничный вывод: after_id - item_id последней строки предыдущей страницы.
+    """
+    result = await db.execute(inventory_rows_query(user_id, item_type, after_id, limit))
+    return [InventoryRow(*row) for row in result.all()]
 
 
-def use_item(db: Session, user_id: int, item_id: int):
+async def use_item(db: AsyncSession, user_id: int, item_id: int):
     """Использовать предмет из инвентаря"""
-    user_item = db.query(UserItem).filter(
+    result = await db.execute(select(UserItem).where(
         UserItem.user_id == user_id,
         UserItem.item_id == item_id
-    ).first()
+    ))
+    user_item = result.scalars().first()
 
     if not user_item or user_item.quantity <= 0:
         return {'success': False, 'message': 'У тебя нет этого предмета!'}
@@ -276,22 +379,21 @@ def use_item(db: Session, user_id: int, item_id: int):
     user_item.quantity -= 1
 
     if user_item.quantity == 0:
-        db.delete(user_item)
+        await db.delete(user_item)
 
-    db.commit()
-
-    return {'success': True, 'item': user_item.item}
+    return {'success': True, 'item': get_catalog().get(item_id)}
 
 
 # === НАВЫКИ ===
 
-def learn_skill(db: Session, pet_id: int, skill_name: str, skill_type: str):
+async def learn_skill(db: AsyncSession, pet_id: int, skill_name: str, skill_type: str):
     """Изучить новый навык"""
     # Проверяем, есть ли уже такой навык
-    existing = db.query(PetSkill).filter(
+    result = await db.execute(select(PetSkill).where(
         PetSkill.pet_id == pet_id,
         PetSkill.skill_name == skill_name
-    ).first()
+    ))
+    existing = result.scalars().first()
 
     if existing:
         return {'success': False, 'message': 'Питомец уже знает этот навык!'}
@@ -302,39 +404,185 @@ def learn_skill(db: Session, pet_id: int, skill_name: str, skill_type: str):
         skill_type=skill_type
     )
     db.add(skill)
-    db.commit()
-    db.refresh(skill)
+    await db.flush()
 
     return {'success': True, 'skill': skill}
 
 
-def get_pet_skills(db: Session, pet_id: int):
+async def get_pet_skills(db: AsyncSession, pet_id: int):
     """Получить все навыки питомца"""
-    return db.query(PetSkill).filter(PetSkill.pet_id == pet_id).all()
+    result = await db.execute(select(PetSkill).where(PetSkill.pet_id == pet_id))
+    return result.scalars().all()
 
 
 # === АВТООБНОВЛЕНИЕ СТАТОВ ===
 
-def auto_update_pet_stats(db: Session):
+async def get_pet_id_range(db: AsyncSession):
+    """Минимальный и максимальный ID питомцев (None, None если питомцев нет)"""
+    result = await db.execute(select(func.min(Pet.id), func.max(Pet.id)))
+    return result.one()
+
+
+async def decay_pets_range(db: AsyncSession, after_id: int, last_id: int, now: datetime):
     """
-    Автоматическое снижение статов со временем
-    Запускать эту функцию периодически (например, каждый час)
+    Записать снижение статов питомцев с ID в (after_id, last_id] одним UPDATE
+
+    Считает то же, что decay.current_stats, но на стороне SQLite.
+    Коммит делает вызывающий код. Возвращает число изменённых строк.
     """
-    all_pets = db.query(Pet).all()
+    values, due = sql_decay_values(Pet, now)
+    stmt = (
+        update(Pet)
+        .where(Pet.id > after_id, Pet.id <= last_id, or_(*due))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+# === НАПОМИНАНИЯ О ПИТОМЦАХ ===
+
+def due_pets_query(now: datetime, limit: int = 100):
+    """Питомцы, которым пора напомнить, с telegram_id владельца - по индексу care_due_at"""
+    return (
+        select(Pet, User.telegram_id)
+        .join(User, Pet.owner_id == User.id)
+        .where(Pet.care_due_at <= now)
+        .order_by(Pet.care_due_at)
+        .limit(limit)
+    )
 
-    for pet in all_pets:
-        now = datetime.now()
 
-        # Снижение здоровья (если не кормили > 4 часов)
-        if (now - pet.last_fed).seconds > 14400:  # 4 часа
-            pet.health = max(5, pet.health - 5)  # Не опускаем до 0, минимум 5
+async def get_due_pets(db: AsyncSession, now: datetime, limit: int = 100):
+    """Список (pet, telegram_id) со статами на момент now"""
+    result = await db.execute(due_pets_query(now, limit))
+    rows = result.all()
+    for pet, _ in rows:
+        refresh_stats(pet, now)
+    return rows
 
-        # Снижение счастья (если не играли > 6 часов)
-        if (now - pet.last_played).seconds > 21600:  # 6 часов
-            pet.happiness = max(5, pet.happiness - 5)
 
-        # Снижение энергии (всегда, если не спал > 3 часов)
-        if (now - pet.last_sleep).seconds > 10800:  # 3 часа
-            pet.energy = max(0, pet.energy - 3)
+async def get_next_care_due(db: AsyncSession):
+    """Ближайший срок напоминания (None, если напоминать некому)"""
+    result = await db.execute(select(func.min(Pet.care_due_at)))
+    return result.scalar_one()
 
-    db.commit()
\ No newline at end of file
+
+# === ДЕЙСТВИЯ ИЗ MINI APP ===
+
+async def get_action_results(db: AsyncSession, user_id: int, keys) -> dict:
+    """Результаты уже применённых действий: ключ -> dict"""
+    result = await db.execute(
+        select(WebAppAction.key, WebAppAction.result)
+        .where(WebAppAction.user_id == user_id, WebAppAction.key.in_(list(keys)))
+    )
+    return {key: json.loads(data) for key, data in result.all()}
+
+
+async def save_action_results(db: AsyncSession, user_id: int, actions: list, now: datetime = None):
+    """Запомнить применённые действия одним INSERT
+
+    actions - словари с key, action, result (dict) и client_at.
+    """
+    now = now or datetime.now()
+    await db.execute(insert(WebAppAction), [
+        {
+            'user_id': user_id,
+            'key': action['key'],
+            'action': action['action'],
+            'result': json.dumps(action['result'], ensure_ascii=False),
+            'client_at': action['client_at'],
+            'created_at': now,
+        }
+        for action in actions
+    ])
+
+
+async def delete_old_action_results(db: AsyncSession, before: datetime) -> int:
+    """Забыть ключи действий старше before; возвращает число удалённых"""
+    result = await db.execute(
+        delete(WebAppAction)
+        .where(WebAppAction.created_at < before)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# === РАССЫЛКИ ===
+
+def user_ids_query(after_id: int = 0, limit: int = 500):
+    """Страница (id, telegram_id) пользователей после after_id - по первичному ключу, без OFFSET"""
+    return (
+        select(User.id, User.telegram_id)
+        .where(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+
+
+async def get_user_ids_page(db: AsyncSession, after_id: int = 0, limit: int = 500):
+    """Следующая страница получателей рассылки: список (id, telegram_id)"""
+    result = await db.execute(user_ids_query(after_id, limit))
+    return result.all()
+
+
+async def count_users(db: AsyncSession, after_id: int = 0) -> int:
+    """Число пользователей с ID больше after_id"""
+    result = await db.execute(select(func.count(User.id)).where(User.id > after_id))
+    return result.scalar_one()
+
+
+async def create_broadcast(db: AsyncSession, text: str, created_by: int, total: int,
+                           report_chat_id: int = None, report_message_id: int = None):
+    """Новая рассылка (flush, чтобы был ID)"""
+    broadcast = Broadcast(
+        text=text, created_by=created_by, total=total, status='running',
+        report_chat_id=report_chat_id, report_message_id=report_message_id,
+    )
+    db.add(broadcast)
+    await db.flush()
+    return broadcast
+
+
+async def get_broadcast(db: AsyncSession, broadcast_id: int):
+    """Рассылка по ID (или None)"""
+    return await db.get(Broadcast, broadcast_id)
+
+
+async def get_broadcasts(db: AsyncSession, status: str = None, limit: int = None):
+    """Рассылки, новые первыми"""
+    query = select(Broadcast).order_by(Broadcast.id.desc())
+    if status:
+        query = query.where(Broadcast.status == status)
+    if limit:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def save_broadcast_progress(db: AsyncSession, broadcast_id: int, last_user_id: int,
+                                  sent: int, blocked: int, failed: int, status: str = None):
+    """Записать курсор и счётчики рассылки одним UPDATE"""
+    values = {'last_user_id': last_user_id, 'sent': sent, 'blocked': blocked, 'failed': failed}
+    if status:
+        values['status'] = status
+        if status != 'running':
+            values['finished_at'] = datetime.now()
+    await db.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def cancel_broadcast(db: AsyncSession, broadcast_id: int) -> bool:
+    """Отменить идущую рассылку; False, если её нет или она уже закончилась"""
+    result = await db.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id, Broadcast.status == 'running')
+        .values(status='cancelled', finished_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
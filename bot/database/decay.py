@@ -0,0 +1,157 @@
+"""
+Ленивое снижение статов питомца
+
+Статы не пересчитываются обходом всей таблицы. Текущее значение вычисляется
+при чтении по last_fed/last_played/last_sleep и stats_updated_at (на какой
+момент посчитаны сохранённые статы), а в БД попадает только когда питомца
+действительно меняют.
+
+Формула совпадает с ежечасным тиком: тик срабатывает в начале каждого часа,
+и стат падает, если к этому моменту с последнего действия прошло больше порога.
+Поэтому результат не зависит от того, как часто питомца читают или сохраняют.
+"""
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, case, cast, func, inspect
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+
+# Период тика в секундах
+DECAY_INTERVAL = 3600
+
+DecayRule = namedtuple('DecayRule', ['stat', 'clock', 'threshold', 'amount', 'floor'])
+
+DECAY_RULES = (
+    # Здоровье падает, если не кормили > 4 часов (минимум 5)
+    DecayRule('health', 'last_fed', 4 * 3600, 5, 5),
+    # Счастье падает, если не играли > 6 часов (минимум 5)
+    DecayRule('happiness', 'last_played', 6 * 3600, 5, 5),
+    # Энергия падает, если не спал > 3 часов
+    DecayRule('energy', 'last_sleep', 3 * 3600, 3, 0),
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(moment: datetime) -> int:
+    """Целые секунды от начала эпохи (как strftime('%s') в SQLite)"""
+    return int((moment - _EPOCH).total_seconds())
+
+
+def from_seconds(seconds: int) -> datetime:
+    """Обратное к to_seconds"""
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def decay_ticks(since: datetime, last_action: datetime, now: datetime, threshold: int) -> int:
+    """Сколько тиков попало в интервал (since, now] после порога last_action + threshold"""
+    start = max(to_seconds(since), to_seconds(last_action) + threshold)
+    end = to_seconds(now)
+    if end <= start:
+        return 0
+    return end // DECAY_INTERVAL - start // DECAY_INTERVAL
+
+
+def current_stats(pet, now: datetime = None) -> dict:
+    """Статы питомца на момент now с учётом снижения"""
+    now = now or datetime.now()
+    since = pet.stats_updated_at or pet.created_at or now
+
+    stats = {}
+    for rule in DECAY_RULES:
+        value = getattr(pet, rule.stat)
+        ticks = decay_ticks(since, getattr(pet, rule.clock) or since, now, rule.threshold)
+        if ticks:
+            value = max(rule.floor, value - rule.amount * ticks)
+        stats[rule.stat] = value
+    return stats
+
+
+def stat_reaches(pet, rule: DecayRule, limit: float, now: datetime = None):
+    """Момент, когда стат rule.stat опустится до limit, если о питомце не заботиться
+
+    Та же формула, что в current_stats, решённая относительно времени: нужное
+    число тиков известно сразу, поэтому дату можно хранить и не пересчитывать
+    до следующего изменения питомца. None - стат не опустится так низко
+    (limit ниже rule.floor). Если стат уже не выше limit, возвращается
+    ближайший тик после последнего изменения.
+    """
+    since = pet.stats_updated_at or pet.created_at or now or datetime.now()
+    value = getattr(pet, rule.stat)
+    if value <= limit:
+        return from_seconds((to_seconds(since) // DECAY_INTERVAL + 1) * DECAY_INTERVAL)
+    if rule.floor > limit:
+        return None
+
+    ticks = math.ceil((value - limit) / rule.amount)
+    start = max(to_seconds(since), to_seconds(getattr(pet, rule.clock) or since) + rule.threshold)
+    return from_seconds((start // DECAY_INTERVAL + ticks) * DECAY_INTERVAL)
+
+
+def refresh_stats(pet, now: datetime = None):
+    """Показать актуальные статы при чтении
+
+    Значения подставляются как уже сохранённые, поэтому само чтение ничего не
+    пишет в БД. Питомца с несохранёнными изменениями не трогаем - его статы уже
+    зафиксированы через settle_stats.
+    """
+    if inspect(pet).modified:
+        return pet
+
+    now = now or datetime.now()
+    for stat, value in current_stats(pet, now).items():
+        set_committed_value(pet, stat, value)
+    set_committed_value(pet, 'stats_updated_at', now)
+    return pet
+
+
+def settle_stats(pet, now: datetime = None):
+    """Зафиксировать снижение статов перед изменением питомца
+
+    Вызывать до того, как менять статы или last_fed/last_played/last_sleep:
+    все статы и stats_updated_at попадут в БД вместе с изменением.
+    """
+    now = now or datetime.now()
+    for stat, value in current_stats(pet, now).items():
+        setattr(pet, stat, value)
+        flag_modified(pet, stat)
+    # refresh_stats мог уже подставить то же now как сохранённое - без флага
+    # статы ушли бы в БД со старой отметкой и при чтении снизились бы ещё раз
+    pet.stats_updated_at = now
+    flag_modified(pet, 'stats_updated_at')
+    return pet
+
+
+# === SQL-ВЕРСИЯ ФОРМУЛЫ (для пакетного UPDATE) ===
+
+def _sql_seconds(column):
+    return cast(func.strftime('%s', column), Integer)
+
+
+def sql_decay_ticks(rule, pet_table, now: datetime):
+    """SQL-выражение decay_ticks для одного правила"""
+    since = func.coalesce(pet_table.stats_updated_at, pet_table.created_at)
+    clock = func.coalesce(getattr(pet_table, rule.clock), since)
+    start = func.max(_sql_seconds(since), _sql_seconds(clock) + rule.threshold)
+    end = to_seconds(now)
+    return case(
+        (start < end, end // DECAY_INTERVAL - start // DECAY_INTERVAL),
+        else_=0
+    )
+
+
+def sql_decay_values(pet_table, now: datetime):
+    """Значения для UPDATE и условие "есть что снижать" по всем правилам"""
+    values = {}
+    due = []
+    for rule in DECAY_RULES:
+        column = getattr(pet_table, rule.stat)
+        ticks = sql_decay_ticks(rule, pet_table, now)
+        values[rule.stat] = case(
+            (ticks > 0, func.max(rule.floor, column - rule.amount * ticks)),
+            else_=column
+        )
+        due.append(ticks > 0)
+    values['stats_updated_at'] = now
+    return values, due
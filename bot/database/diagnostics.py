@@ -0,0 +1,54 @@
+"""
+Проверка планов запросов SQLite
+
+Горячие запросы должны идти по индексам. explain() возвращает план
+EXPLAIN QUERY PLAN, full_scans() - шаги с полным обходом таблицы.
+Используется в тестах и в scripts/check_query_plans.py.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .crud import due_pets_query, inventory_rows_query, user_ids_query
+from .models import Pet, PetSkill, Quest, UserItem, WebAppAction
+
+# Запросы с горячих путей: имя -> запрос с типичными параметрами
+HOT_QUERIES = {
+    'user_pets': select(Pet).where(Pet.owner_id == 1),
+    'user_inventory': select(UserItem).where(UserItem.user_id == 1),
+    'inventory_page': inventory_rows_query(1, 'food', after_id=1, limit=20),
+    'user_item': select(UserItem).where(UserItem.user_id == 1, UserItem.item_id == 1),
+    'pet_skills': select(PetSkill).where(PetSkill.pet_id == 1),
+    'pet_skill': select(PetSkill).where(PetSkill.pet_id == 1, PetSkill.skill_name == 'x'),
+    'due_pets': due_pets_query(datetime(2026, 1, 1)),
+    'broadcast_page': user_ids_query(after_id=1, limit=500),
+    'action_keys': select(WebAppAction).where(WebAppAction.user_id == 1, WebAppAction.key.in_(['a', 'b'])),
+    'active_quests': select(Quest).where(Quest.user_id == 1, Quest.completed.is_(False)),
+}
+
+
+async def explain(db: AsyncSession, statement) -> list:
+    """Шаги плана запроса (колонка detail из EXPLAIN QUERY PLAN)"""
+    compiled = statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True})
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}')
+    return [row[-1] for row in result.all()]
+
+
+def full_scans(plan: list) -> list:
+    """Шаги плана, которые обходят таблицу целиком"""
+    return [step for step in plan if step.startswith('SCAN ') and 'CONSTANT ROW' not in step]
+
+
+async def assert_no_full_scan(db: AsyncSession, statement):
+    """Упасть с AssertionError, если запрос обходит таблицу целиком"""
+    plan = await explain(db, statement)
+    scans = full_scans(plan)
+    assert not scans, f'Полный обход таблицы: {scans}\n{statement}'
+
+
+async def check_hot_queries(db: AsyncSession) -> dict:
+    """Полные обходы по каждому горячему запросу (пустой список - всё хорошо)"""
+    return {name: full_scans(await explain(db, statement)) for name, statement in HOT_QUERIES.items()}
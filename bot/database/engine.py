@@ -0,0 +1,97 @@
+"""
+Подключение к базе данных
+
+Асинхронный движок SQLAlchemy поверх aiosqlite: запросы к SQLite не блокируют
+event loop aiogram, пока другие апдейты ждут ответа от Telegram.
+
+Движков два: engine - пишущее соединение (SQLite всё равно пишет по одному),
+reader_engine - пул соединений только для чтения. В режиме WAL читатели
+не ждут писателя, поэтому просмотр статистики не стоит в очереди за записью.
+Пишущее соединение нельзя держать во время сетевых запросов: сессия апдейта
+коммитится перед каждым обращением к Telegram (middlewares/database.py).
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config_reader import config
+
+DATABASE_URL = f'sqlite+aiosqlite:///{config.DATABASE_PATH}'
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=config.DB_ECHO,
+    pool_size=config.DB_WRITER_POOL_SIZE,
+    max_overflow=0,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+)
+
+reader_engine = create_async_engine(
+    DATABASE_URL,
+    echo=config.DB_ECHO,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+)
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # Режим журнала хранится в самом файле БД - его переключает писатель
+        cursor.execute(f'PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}')
+    cursor.execute(f'PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}')
+    cursor.execute(f'PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}')
+    cursor.execute(f'PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}')
+    cursor.execute(f'PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT)}')
+    cursor.execute(f'PRAGMA temp_store={config.SQLITE_TEMP_STORE}')
+    if read_only:
+        cursor.execute('PRAGMA query_only=ON')
+    cursor.close()
+
+
+@event.listens_for(engine.sync_engine, 'connect')
+def _on_writer_connect(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, read_only=False)
+
+
+@event.listens_for(reader_engine.sync_engine, 'connect')
+def _on_reader_connect(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, read_only=True)
+
+
+# expire_on_commit=False - после commit объекты остаются читаемыми без нового запроса
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+read_session = async_sessionmaker(reader_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def init_db():
+    """Применить миграции (то же, что alembic upgrade head)"""
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade_to_head)
+
+
+def _upgrade_to_head(connection):
+    alembic_config = Config()
+    alembic_config.set_main_option('script_location', MIGRATIONS_PATH)
+    alembic_config.attributes['connection'] = connection
+    command.upgrade(alembic_config, 'head')
+
+
+def get_db() -> AsyncSession:
+    """Новая сессия БД
+
+    Пример: async with get_db() as db: ...
+    """
+    return async_session()
+
+
+async def close_db():
+    """Закрыть все соединения обоих пулов"""
+    await engine.dispose()
+    await reader_engine.dispose()
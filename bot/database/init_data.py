@@ -2,17 +2,22 @@
 Начальные данные для базы данных
 Запусти этот файл один раз после создания БД чтобы добавить стартовые предметы
 """
-from sqlalchemy.orm import Session
+import asyncio
+
+from sqlalchemy import select
 from .models import Item
 from .engine import get_db
 
 
-def add_starter_items():
+async def add_starter_items():
     """Добавить стартовые предметы в БД"""
-    db = get_db()
+    async with get_db() as db:
+        await _add_starter_items(db)
+
 
+async def _add_starter_items(db):
     # Проверяем, есть ли уже предметы
-    existing = db.query(Item).first()
+    existing = (await db.execute(select(Item).limit(1))).scalars().first()
     if existing:
         print('⚠️ Предметы уже добавлены в БД!')
         return
@@ -260,10 +265,9 @@ def add_starter_items():
     # Добавляем всё в БД
     all_items = foods + equipment + cosmetics
 
-    for item in all_items:
-        db.add(item)
+    db.add_all(all_items)
 
-    db.commit()
+    await db.commit()
 
     print(f'✅ Добавлено {len(all_items)} предметов!')
     print(f'   - Еды: {len(foods)}')
@@ -272,4 +276,4 @@ def add_starter_items():
 
 
 if __name__ == '__main__':
-    add_starter_items()
\ No newline at end of file
+    asyncio.run(add_starter_items())
\ No newline at end of file
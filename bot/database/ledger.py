@@ -0,0 +1,35 @@
+"""
+Журнал изменений баланса
+
+Записи копятся в сессии и вставляются одним пакетом перед commit, в той же
+транзакции, что и само изменение баланса.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from .models import CurrencyLedger
+
+
+def record(db, user_id: int, coins: int, crystals: int, reason: str = None):
+    """Добавить запись в журнал текущей сессии"""
+    db.info.setdefault('ledger', []).append({
+        'user_id': user_id,
+        'coins_delta': coins,
+        'crystals_delta': crystals,
+        'reason': reason,
+        'created_at': datetime.now(),
+    })
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_ledger(session):
+    rows = session.info.pop('ledger', None)
+    if rows:
+        session.execute(insert(CurrencyLedger), rows)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_ledger(session):
+    session.info.pop('ledger', None)
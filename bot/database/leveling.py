@@ -0,0 +1,42 @@
+"""
+Уровни, опыт и эволюции питомца
+
+Таблицы считаются один раз при импорте, поэтому любое начисление опыта
+(хоть 10 XP, хоть награда за ивент на десятки уровней) разбирается за O(1)
+без цикла по уровням.
+"""
+from bisect import bisect_right
+
+MAX_LEVEL = 99
+
+# Уровни, на которых питомец переходит на следующую стадию эволюции
+EVOLUTION_LEVELS = (5, 15, 30, 50, 75)
+
+# CUMULATIVE_XP[level] - сколько опыта всего нужно, чтобы дойти с 1 уровня до level
+# (для перехода с level на level + 1 нужно level * 100 XP)
+CUMULATIVE_XP = tuple(50 * level * (level - 1) for level in range(MAX_LEVEL + 1))
+
+
+def xp_to_next_level(level: int) -> int:
+    """Сколько XP нужно набрать на уровне level для перехода на следующий"""
+    return level * 100
+
+
+def total_xp(level: int, xp: int) -> int:
+    """Весь опыт питомца с 1 уровня (для рейтингов)"""
+    return CUMULATIVE_XP[min(level, MAX_LEVEL)] + xp
+
+
+def resolve_level(level: int, xp: int, gained: int):
+    """Уровень и остаток опыта после начисления gained XP
+
+    На максимальном уровне опыт продолжает копиться.
+    """
+    total = total_xp(level, xp) + gained
+    new_level = min(MAX_LEVEL, bisect_right(CUMULATIVE_XP, total, 1) - 1)
+    return new_level, total - CUMULATIVE_XP[new_level]
+
+
+def evolution_stage(level: int) -> int:
+    """Стадия эволюции, положенная питомцу на уровне level (0-5)"""
+    return bisect_right(EVOLUTION_LEVELS, level)
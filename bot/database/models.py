@@ -1,7 +1,7 @@
 """
 Модели базы данных для Digital Pet
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -40,6 +40,10 @@ class User(Base):
 class Pet(Base):
     """Питомец пользователя"""
     __tablename__ = 'pets'
+    __table_args__ = (
+        Index('ix_pets_owner_id', 'owner_id'),
+        Index('ix_pets_care_due_at', 'care_due_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -71,6 +75,8 @@ class Pet(Base):
     last_fed = Column(DateTime, default=datetime.now)
     last_played = Column(DateTime, default=datetime.now)
     last_sleep = Column(DateTime, default=datetime.now)
+    stats_updated_at = Column(DateTime, default=datetime.now)  # На какой момент посчитаны статы
+    care_due_at = Column(DateTime, nullable=True)  # Когда напомнить о питомце (database/care.py)
 
     # Статистика
     total_games_played = Column(Integer, default=0)
@@ -86,6 +92,9 @@ class Pet(Base):
 class PetSkill(Base):
     """Навыки питомца"""
     __tablename__ = 'pet_skills'
+    __table_args__ = (
+        Index('uq_pet_skills_pet_skill', 'pet_id', 'skill_name', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     pet_id = Column(Integer, ForeignKey('pets.id'), nullable=False)
@@ -131,6 +140,9 @@ class Item(Base):
 class UserItem(Base):
     """Предметы пользователя (инвентарь)"""
     __tablename__ = 'user_items'
+    __table_args__ = (
+        Index('uq_user_items_user_item', 'user_id', 'item_id', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -161,6 +173,9 @@ class PetEquipment(Base):
 class Quest(Base):
     """Ежедневные квесты"""
     __tablename__ = 'quests'
+    __table_args__ = (
+        Index('ix_quests_user_completed', 'user_id', 'completed'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -174,4 +189,64 @@ class Quest(Base):
     reward_xp = Column(Integer, default=100)
 
     created_at = Column(DateTime, default=datetime.now)
-    completed_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    completed_at = Column(DateTime, nullable=True)
+
+
+class CurrencyLedger(Base):
+    """Журнал изменений баланса (только добавление)"""
+    __tablename__ = 'currency_ledger'
+    __table_args__ = (
+        Index('ix_currency_ledger_user_id', 'user_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+
+    coins_delta = Column(Integer, default=0)
+    crystals_delta = Column(Integer, default=0)
+    reason = Column(String(50))  # purchase, quest, admin_gift, etc.
+
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class Broadcast(Base):
+    """Рассылка всем пользователям с курсором для продолжения после рестарта"""
+    __tablename__ = 'broadcasts'
+
+    id = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)
+    status = Column(String(20), default='running')  # running, done, cancelled
+    created_by = Column(Integer)  # telegram_id админа
+
+    # Сообщение админа, в котором обновляется прогресс
+    report_chat_id = Column(Integer)
+    report_message_id = Column(Integer)
+
+    # Курсор: последний обработанный users.id
+    last_user_id = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    blocked = Column(Integer, default=0)  # Бот заблокирован или чат удалён
+    failed = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class WebAppAction(Base):
+    """Применённое действие из Mini App - по ключу идемпотентности"""
+    __tablename__ = 'webapp_actions'
+    __table_args__ = (
+        Index('uq_webapp_actions_user_key', 'user_id', 'key', unique=True),
+        Index('ix_webapp_actions_created_at', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    key = Column(String(64), nullable=False)  # Ключ, который прислал клиент
+
+    action = Column(String(20))  # feed, play, rest, buy
+    result = Column(Text)  # JSON-ответ, который получит и повторный запрос
+    client_at = Column(DateTime)  # Когда действие сделано на клиенте
+
+    created_at = Column(DateTime, default=datetime.now)
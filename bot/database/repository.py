@@ -0,0 +1,379 @@
+"""
+Репозиторий: игровые данные за одним интерфейсом
+
+Repository описывает операции над пользователями, питомцами, предметами,
+инвентарём и навыками. SqlRepository - обёртка над crud.py и сессией БД,
+MemoryRepository - то же самое на словарях, без SQLite. Правила игры у обоих
+общие (rules.py, decay.py, leveling.py), поэтому в памяти можно гонять
+бенчмарки и быстрые проверки логики, а разницу с SQL считать накладными
+расходами хранилища (см. scripts/bench_repository.py).
+"""
+import itertools
+from abc import ABC, abstractmethod
+import random
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, rules
+from .catalog import ItemCatalog, ItemView, get_catalog
+from .decay import current_stats
+from .models import Pet, PetSkill, User
+
+# Баланс после изменения: как строка (coins, crystals) из crud.update_user_currency
+Balance = namedtuple('Balance', ['coins', 'crystals'])
+
+
+class Repository(ABC):
+    """Интерфейс хранилища; сигнатуры и результаты - как у одноимённых функций crud.py
+
+    Наследник, не реализовавший какой-то метод, не создастся (TypeError).
+    """
+
+    # Пользователи
+    @abstractmethod
+    async def get_user(self, telegram_id: int):
+        ...
+
+    @abstractmethod
+    async def get_or_create_user(self, telegram_id: int, username: str = None, first_name: str = None):
+        ...
+
+    @abstractmethod
+    async def update_user_currency(self, user_id: int, coins: int = 0, crystals: int = 0,
+                                   reason: str = None, allow_overdraft: bool = False):
+        ...
+
+    # Питомцы
+    @abstractmethod
+    async def create_pet(self, owner_id: int, name: str, species: str, personality: str,
+                         color: str = 'blue', pattern: str = 'solid'):
+        ...
+
+    @abstractmethod
+    async def get_user_pets(self, user_id: int):
+        ...
+
+    @abstractmethod
+    async def get_pet_by_id(self, pet_id: int):
+        ...
+
+    @abstractmethod
+    async def update_pet_stats(self, pet_id: int, **stats):
+        ...
+
+    @abstractmethod
+    async def feed_pet(self, pet_id: int, food_item: ItemView):
+        ...
+
+    @abstractmethod
+    async def add_pet_xp(self, pet_id: int, xp_amount: int):
+        ...
+
+    @abstractmethod
+    async def play_with_pet(self, pet_id: int, game_type: str = 'simple'):
+        ...
+
+    @abstractmethod
+    async def rest_pet(self, pet_id: int):
+        ...
+
+    # Предметы и инвентарь
+    @abstractmethod
+    async def get_item_by_id(self, item_id: int):
+        ...
+
+    @abstractmethod
+    async def get_all_items(self, item_type: str = None):
+        ...
+
+    @abstractmethod
+    async def add_items_to_user(self, user_id: int, items: dict):
+        ...
+
+    @abstractmethod
+    async def grant_items(self, grants: dict):
+        ...
+
+    @abstractmethod
+    async def get_inventory_rows(self, user_id: int, item_type: str = None,
+                                 after_id: int = None, limit: int = None):
+        ...
+
+    @abstractmethod
+    async def use_item(self, user_id: int, item_id: int):
+        ...
+
+    # Навыки
+    @abstractmethod
+    async def learn_skill(self, pet_id: int, skill_name: str, skill_type: str):
+        ...
+
+    @abstractmethod
+    async def get_pet_skills(self, pet_id: int):
+        ...
+
+
+class SqlRepository(Repository):
+    """Репозиторий поверх сессии БД; commit - как и раньше, снаружи"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user(self, telegram_id):
+        return await crud.get_user(self.db, telegram_id)
+
+    async def get_or_create_user(self, telegram_id, username=None, first_name=None):
+        return await crud.get_or_create_user(self.db, telegram_id, username, first_name)
+
+    async def update_user_currency(self, user_id, coins=0, crystals=0, reason=None, allow_overdraft=False):
+        return await crud.update_user_currency(self.db, user_id, coins, crystals, reason, allow_overdraft)
+
+    async def create_pet(self, owner_id, name, species, personality, color='blue', pattern='solid'):
+        return await crud.create_pet(self.db, owner_id, name, species, personality, color, pattern)
+
+    async def get_user_pets(self, user_id):
+        return await crud.get_user_pets(self.db, user_id)
+
+    async def get_pet_by_id(self, pet_id):
+        return await crud.get_pet_by_id(self.db, pet_id)
+
+    async def update_pet_stats(self, pet_id, **stats):
+        return await crud.update_pet_stats(self.db, pet_id, **stats)
+
+    async def feed_pet(self, pet_id, food_item):
+        return await crud.feed_pet(self.db, pet_id, food_item)
+
+    async def add_pet_xp(self, pet_id, xp_amount):
+        return await crud.add_pet_xp(self.db, pet_id, xp_amount)
+
+    async def play_with_pet(self, pet_id, game_type='simple'):
+        return await crud.play_with_pet(self.db, pet_id, game_type)
+
+    async def rest_pet(self, pet_id):
+        return await crud.rest_pet(self.db, pet_id)
+
+    async def get_item_by_id(self, item_id):
+        return await crud.get_item_by_id(self.db, item_id)
+
+    async def get_all_items(self, item_type=None):
+        return await crud.get_all_items(self.db, item_type)
+
+    async def add_items_to_user(self, user_id, items):
+        return await crud.add_items_to_user(self.db, user_id, items)
+
+    async def grant_items(self, grants):
+        return await crud.grant_items(self.db, grants)
+
+    async def get_inventory_rows(self, user_id, item_type=None, after_id=None, limit=None):
+        return await crud.get_inventory_rows(self.db, user_id, item_type, after_id, limit)
+
+    async def use_item(self, user_id, item_id):
+        return await crud.use_item(self.db, user_id, item_id)
+
+    async def learn_skill(self, pet_id, skill_name, skill_type):
+        return await crud.learn_skill(self.db, pet_id, skill_name, skill_type)
+
+    async def get_pet_skills(self, pet_id):
+        return await crud.get_pet_skills(self.db, pet_id)
+
+
+def _new(model, ids, **values):
+    """Объект модели со значениями по умолчанию из колонок, как после INSERT"""
+    obj = model()
+    for column in model.__table__.columns:
+        default = column.default
+        if default is not None:
+            setattr(obj, column.key, default.arg(None) if default.is_callable else default.arg)
+    for key, value in values.items():
+        setattr(obj, key, value)
+    obj.id = next(ids)
+    return obj
+
+
+def _settle(pet, now: datetime = None):
+    """Как decay.settle_stats, но без отметок для ORM: хранить больше негде"""
+    now = now or datetime.now()
+    for stat, value in current_stats(pet, now).items():
+        setattr(pet, stat, value)
+    pet.stats_updated_at = now
+    return pet
+
+
+class MemoryRepository(Repository):
+    """Репозиторий на словарях
+
+    Объекты - обычные экземпляры моделей без сессии; изменения видны сразу,
+    commit и rollback не нужны. Справочник предметов - ItemCatalog
+    (по умолчанию текущий, см. catalog.py).
+    """
+
+    def __init__(self, catalog: ItemCatalog = None):
+        self.catalog = catalog or get_catalog()
+        self.users = {}
+        self.pets = {}
+        self.inventory = defaultdict(dict)  # user_id -> {item_id: quantity}
+        self.skills = defaultdict(dict)  # pet_id -> {skill_name: PetSkill}
+        self.ledger = []
+        self._users_by_telegram_id = {}
+        self._pets_by_owner = defaultdict(list)
+        self._ids = defaultdict(lambda: itertools.count(1))
+
+    # === ПОЛЬЗОВАТЕЛИ ===
+
+    async def get_user(self, telegram_id):
+        user = self._users_by_telegram_id.get(telegram_id)
+        if user:
+            now = datetime.now()
+            user.login_streak = rules.login_streak(user.last_login_date, user.login_streak, now)
+            user.last_active = now
+            user.last_login_date = now
+        return user
+
+    async def get_or_create_user(self, telegram_id, username=None, first_name=None):
+        user = await self.get_user(telegram_id)
+        if not user:
+            user = _new(
+                User, self._ids[User],
+                telegram_id=telegram_id,
+                username=username,
+                first_name=first_name,
+                coins=rules.STARTER_COINS,
+                crystals=rules.STARTER_CRYSTALS
+            )
+            self.users[user.id] = user
+            self._users_by_telegram_id[telegram_id] = user
+        return user
+
+    async def update_user_currency(self, user_id, coins=0, crystals=0, reason=None, allow_overdraft=False):
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        if not coins and not crystals:
+            return Balance(user.coins, user.crystals)
+        if not allow_overdraft and (user.coins + coins < 0 or user.crystals + crystals < 0):
+            return None
+
+        user.coins += coins
+        user.crystals += crystals
+        self.ledger.append({
+            'user_id': user_id,
+            'coins_delta': coins,
+            'crystals_delta': crystals,
+            'reason': reason,
+            'created_at': datetime.now(),
+        })
+        return Balance(user.coins, user.crystals)
+
+    # === ПИТОМЦЫ ===
+
+    async def create_pet(self, owner_id, name, species, personality, color='blue', pattern='solid'):
+        pet = _new(
+            Pet, self._ids[Pet],
+            owner_id=owner_id,
+            name=name,
+            species=species,
+            personality=personality,
+            color=color,
+            pattern=pattern,
+            **rules.STARTER_PET_STATS
+        )
+        self.pets[pet.id] = pet
+        self._pets_by_owner[owner_id].append(pet)
+        return pet
+
+    async def get_user_pets(self, user_id):
+        now = datetime.now()
+        return [_settle(pet, now) for pet in self._pets_by_owner.get(user_id, ())]
+
+    async def get_pet_by_id(self, pet_id):
+        pet = self.pets.get(pet_id)
+        return _settle(pet) if pet else None
+
+    async def update_pet_stats(self, pet_id, **stats):
+        pet = await self.get_pet_by_id(pet_id)
+        return rules.apply_stats(pet, **stats) if pet else None
+
+    async def feed_pet(self, pet_id, food_item):
+        pet = await self.get_pet_by_id(pet_id)
+        return rules.apply_food(pet, food_item, datetime.now()) if pet else None
+
+    async def add_pet_xp(self, pet_id, xp_amount):
+        pet = await self.get_pet_by_id(pet_id)
+        if not pet:
+            return None
+        return {'pet': pet, 'leveled_up': rules.apply_xp(pet, xp_amount)}
+
+    async def play_with_pet(self, pet_id, game_type='simple'):
+        pet = await self.get_pet_by_id(pet_id)
+        if not pet:
+            return None
+        return rules.apply_play(pet, random.randint(*rules.PLAY_XP), datetime.now())
+
+    async def rest_pet(self, pet_id):
+        pet = await self.get_pet_by_id(pet_id)
+        return rules.apply_rest(pet, datetime.now()) if pet else None
+
+    # === ПРЕДМЕТЫ ===
+
+    async def get_item_by_id(self, item_id):
+        return self.catalog.get(item_id)
+
+    async def get_all_items(self, item_type=None):
+        return list(self.catalog.of_type(item_type))
+
+    async def add_items_to_user(self, user_id, items):
+        return await self.grant_items({user_id: items})
+
+    async def grant_items(self, grants):
+        count = 0
+        for user_id, items in grants.items():
+            inventory = self.inventory[user_id]
+            for item_id, quantity in items.items():
+                if quantity > 0:
+                    inventory[item_id] = inventory.get(item_id, 0) + quantity
+                    count += 1
+        return count
+
+    async def get_inventory_rows(self, user_id, item_type=None, after_id=None, limit=None):
+        rows = []
+        for item_id in sorted(self.inventory.get(user_id, ())):
+            quantity = self.inventory[user_id][item_id]
+            item = self.catalog.get(item_id)
+            if quantity <= 0 or item is None:
+                continue
+            if (item_type and item.item_type != item_type) or (after_id is not None and item_id <= after_id):
+                continue
+            rows.append(crud.InventoryRow(
+                item.id, item.name, item.icon_emoji, item.item_type, item.rarity, quantity,
+                item.health_effect, item.happiness_effect, item.intelligence_effect, item.energy_effect,
+            ))
+            if limit and len(rows) == limit:
+                break
+        return rows
+
+    async def use_item(self, user_id, item_id):
+        inventory = self.inventory.get(user_id, {})
+        if inventory.get(item_id, 0) <= 0:
+            return {'success': False, 'message': 'У тебя нет этого предмета!'}
+
+        inventory[item_id] -= 1
+        if inventory[item_id] == 0:
+            del inventory[item_id]
+
+        return {'success': True, 'item': self.catalog.get(item_id)}
+
+    # === НАВЫКИ ===
+
+    async def learn_skill(self, pet_id, skill_name, skill_type):
+        skills = self.skills[pet_id]
+        if skill_name in skills:
+            return {'success': False, 'message': 'Питомец уже знает этот навык!'}
+
+        skill = _new(PetSkill, self._ids[PetSkill], pet_id=pet_id, skill_name=skill_name, skill_type=skill_type)
+        skills[skill_name] = skill
+        return {'success': True, 'skill': skill}
+
+    async def get_pet_skills(self, pet_id):
+        return list(self.skills.get(pet_id, {}).values())
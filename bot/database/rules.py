@@ -0,0 +1,101 @@
+"""
+Правила игры без обращения к БД
+
+Функции меняют переданный объект питомца (или считают значения) и ничего не
+знают о хранилище: их вызывают и crud.py, и repository.MemoryRepository.
+Перед вызовом статы питомца должны быть актуальны (settle_stats).
+"""
+from datetime import datetime
+
+from .leveling import evolution_stage, resolve_level
+
+# Стартовые значения нового игрока и питомца
+STARTER_COINS = 100
+STARTER_CRYSTALS = 10
+STARTER_PET_STATS = {'health': 100, 'happiness': 100, 'intelligence': 50, 'energy': 100}
+
+# Опыт за кормление
+FEED_XP = 10
+
+# Игра с питомцем
+PLAY_ENERGY_COST = 10
+PLAY_HAPPINESS = 15
+PLAY_XP = (20, 50)
+
+# Отдых
+REST_ENERGY = 30
+
+
+def clamp(value, low=0, high=100):
+    return max(low, min(high, value))
+
+
+def login_streak(last_login_date: datetime, streak: int, now: datetime) -> int:
+    """Стрик логинов после захода в момент now"""
+    if last_login_date:
+        days_diff = (now.date() - last_login_date.date()).days
+        if days_diff == 1:
+            return streak + 1
+        if days_diff > 1:
+            return 1
+    return streak
+
+
+def apply_stats(pet, **stats):
+    """Прибавить к статам значения из stats, оставаясь в диапазоне 0-100"""
+    for stat in ('health', 'happiness', 'intelligence', 'energy'):
+        if stat in stats:
+            setattr(pet, stat, clamp(getattr(pet, stat) + stats[stat]))
+    return pet
+
+
+def apply_food(pet, food_item, now: datetime):
+    """Эффекты еды (food_item - ItemView)"""
+    pet.health = min(100, pet.health + food_item.health_effect)
+    pet.happiness = min(100, pet.happiness + food_item.happiness_effect)
+    pet.energy = min(100, pet.energy + food_item.energy_effect)
+    pet.intelligence = min(100, pet.intelligence + food_item.intelligence_effect)
+    pet.last_fed = now
+    return pet
+
+
+def apply_xp(pet, xp_amount: int) -> bool:
+    """Начислить опыт и применить эволюцию; True, если уровень вырос"""
+    old_level = pet.level
+    pet.level, pet.xp = resolve_level(pet.level, pet.xp, xp_amount)
+    apply_evolution(pet)
+    return pet.level > old_level
+
+
+def apply_evolution(pet):
+    """Перевести питомца на стадию эволюции по его уровню"""
+    new_stage = evolution_stage(pet.level)
+    if new_stage > pet.evolution_stage:
+        pet.evolution_stage = new_stage
+        # Здесь можно добавить логику изменения внешнего вида
+    return pet
+
+
+def apply_play(pet, xp_gained: int, now: datetime) -> dict:
+    """Игра с питомцем: результат в формате crud.play_with_pet"""
+    if pet.energy < PLAY_ENERGY_COST:
+        return {'success': False, 'message': 'Питомец слишком устал! Дай ему отдохнуть 😴'}
+
+    pet.energy = max(0, pet.energy - PLAY_ENERGY_COST)
+    pet.happiness = min(100, pet.happiness + PLAY_HAPPINESS)
+    pet.total_games_played += 1
+    pet.last_played = now
+
+    return {
+        'success': True,
+        'message': 'Отлично поиграли! 🎮',
+        'xp_gained': xp_gained,
+        'leveled_up': apply_xp(pet, xp_gained)
+    }
+
+
+def apply_rest(pet, now: datetime):
+    """Отдых: восстановить энергию"""
+    pet.energy = min(100, pet.energy + REST_ENERGY)
+    pet.last_sleep = now
+    return pet
@@ -0,0 +1,131 @@
+"""
+Кэш состояния игрока: пользователь и его активный питомец
+
+Меню и статистика перерисовываются на каждое нажатие, а данные меняются
+редко. Снимки хранятся по telegram_id и сбрасываются после commit любой
+сессии, в которой crud изменил пользователя или его питомца.
+Статы питомца в снимке досчитываются по decay при каждом чтении.
+
+Сброс срабатывает один раз, а снимок, прочитанный до чужого commit, может
+прийти в put уже после сброса. Поэтому у кэша есть счётчик поколений:
+каждый сброс пользователя его увеличивает, сессия запоминает поколение в
+начале транзакции (с этого момента она видит данные), и put отбрасывает
+снимок, если пользователя сбросили позже.
+"""
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config_reader import config
+from utils.cache import TTLCache
+from .decay import current_stats
+
+UserSnapshot = namedtuple('UserSnapshot', [
+    'id', 'telegram_id', 'username', 'first_name', 'coins', 'crystals', 'is_premium',
+    'created_at', 'last_active', 'login_streak', 'last_login_date',
+])
+
+PetSnapshot = namedtuple('PetSnapshot', [
+    'id', 'owner_id', 'name', 'species', 'personality', 'color', 'pattern',
+    'health', 'happiness', 'intelligence', 'energy',
+    'level', 'xp', 'evolution_stage', 'evolution_path',
+    'created_at', 'last_fed', 'last_played', 'last_sleep', 'stats_updated_at',
+    'total_games_played', 'battles_won', 'battles_lost',
+])
+
+PlayerState = namedtuple('PlayerState', ['user', 'pet'])
+
+
+def snapshot(cls, obj):
+    """Снимок ORM-объекта"""
+    return cls._make(getattr(obj, field) for field in cls._fields)
+
+
+class PlayerStateCache:
+    """Снимки PlayerState по telegram_id"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # users.id -> telegram_id, чтобы сбрасывать записи по изменённым строкам
+        self._keys = {}
+        self.generation = 0
+        # users.id -> поколение последнего сброса; самые старые вытесняются,
+        # а их наибольшее поколение остаётся в _floor
+        self._changed = OrderedDict()
+        self._floor = 0
+
+    def get(self, telegram_id: int, now: datetime = None):
+        """Состояние из кэша со статами на момент now (или None)"""
+        state = self._entries.get(telegram_id)
+        if state is None or state.pet is None:
+            return state
+        return state._replace(pet=state.pet._replace(**current_stats(state.pet, now)))
+
+    def put(self, state: PlayerState, since: int = None):
+        """Сохранить снимок; since - поколение, с которого снимок прочитан"""
+        if since is not None and self._changed_after(state.user.id, since):
+            return
+        self._entries.set(state.user.telegram_id, state)
+        self._keys[state.user.id] = state.user.telegram_id
+        if len(self._keys) > 2 * self._entries.maxsize:
+            self._compact()
+
+    def invalidate_users(self, user_ids):
+        """Сбросить состояние пользователей по users.id"""
+        for user_id in user_ids:
+            self.generation += 1
+            self._changed[user_id] = self.generation
+            self._changed.move_to_end(user_id)
+            telegram_id = self._keys.pop(user_id, None)
+            if telegram_id is not None:
+                self._entries.pop(telegram_id)
+        while len(self._changed) > 2 * self._entries.maxsize:
+            _, self._floor = self._changed.popitem(last=False)
+
+    def _changed_after(self, user_id: int, since: int) -> bool:
+        # Вытесненного из _changed меняли не позже _floor
+        return self._changed.get(user_id, self._floor) > since
+
+    def clear(self):
+        self._entries.clear()
+        self._keys.clear()
+        self._changed.clear()
+        self._floor = self.generation
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+    def _compact(self):
+        alive = set(self._entries.keys())
+        self._keys = {user_id: key for user_id, key in self._keys.items() if key in alive}
+
+
+state_cache = PlayerStateCache(maxsize=config.STATE_CACHE_SIZE, ttl=config.STATE_CACHE_TTL)
+
+
+def mark_user_changed(db, user_id: int):
+    """Запомнить, что в этой сессии менялся пользователь или его питомец"""
+    db.info.setdefault('changed_users', set()).add(user_id)
+
+
+def is_user_changed(db, user_id: int) -> bool:
+    return user_id in db.info.get('changed_users', ())
+
+
+@event.listens_for(Session, 'after_begin')
+def _remember_generation(session, transaction, connection):
+    session.info['state_generation'] = state_cache.generation
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    changed = session.info.pop('changed_users', None)
+    if changed:
+        state_cache.invalidate_users(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('changed_users', None)
@@ -1,4 +1,4 @@
-from ..config_reader import admin_list
+from config_reader import admin_list
 from aiogram.filters import Filter
 from aiogram.types import Message
 
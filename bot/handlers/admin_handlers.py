@@ -1,8 +1,13 @@
 from aiogram.types import Message
 import aiogram.filters as filters
-from ..filters.admin import IsAdminFilter
-from aiogram import Router, F
-from ..keyboards.inline import inline_main_menu, inline_main_menu_admin
+from filters.admin import IsAdminFilter
+from aiogram import Bot, Router, F
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import crud
+from keyboards.inline import inline_main_menu, inline_main_menu_admin
+from database.catalog import get_catalog, reload_catalog
+from middlewares.ordering import user_ordering
+from services.broadcast import broadcaster, progress_text
 
 router = Router()
 
@@ -11,3 +16,68 @@ router.message.filter(IsAdminFilter())
 @router.message(filters.Command(commands=['admin']))
 async def admin_panel(message: Message):
     await message.answer('Привет, мой дорогой админ!', reply_markup=inline_main_menu_admin())
+
+
+@router.message(filters.Command(commands=['reload_items']))
+async def reload_items(message: Message):
+    """Перечитать справочник предметов после изменения таблицы items"""
+    changed = await reload_catalog()
+    catalog = get_catalog()
+    status = 'обновлён' if changed else 'не изменился'
+    await message.answer(f'📦 Справочник {status}: {len(catalog)} предметов, версия <code>{catalog.version}</code>')
+
+
+@router.message(filters.Command(commands=['queues']))
+async def show_queues(message: Message):
+    """Очереди апдейтов по шардам (см. middlewares/ordering.py)"""
+    stats = user_ordering.stats()
+    busy = [f'{index}: {depth}' for index, depth in enumerate(user_ordering.depths()) if depth]
+    await message.answer(
+        f'📬 Пользователей в обработке: {stats["users"]}, ждут: {stats["waiting"]}, '
+        f'отброшено: {stats["dropped"]}\n'
+        f'Шарды: {", ".join(busy) or "все пусты"}'
+    )
+
+
+@router.message(filters.Command(commands=['broadcast']))
+async def start_broadcast(message: Message, command: filters.CommandObject, db: AsyncSession, bot: Bot):
+    """Разослать текст после команды всем пользователям (HTML-разметка сохраняется)"""
+    if not command.args:
+        await message.answer('Напиши текст рассылки после команды: /broadcast Привет всем!')
+        return
+
+    text = message.html_text.split(maxsplit=1)[1]
+    total = await crud.count_users(db)
+    report = await message.answer(f'📣 Рассылка на {total} пользователей запускается...')
+    broadcast = await crud.create_broadcast(
+        db, text, message.from_user.id, total, report_chat_id=report.chat.id, report_message_id=report.message_id
+    )
+    # Задача рассылки читает запись из другой сессии - коммитим до запуска
+    await db.commit()
+    broadcaster.start(bot, broadcast.id)
+
+
+@router.message(filters.Command(commands=['broadcasts']), flags={'db': 'read'})
+async def show_broadcasts(message: Message, db: AsyncSession):
+    """Последние рассылки и их прогресс"""
+    broadcasts = await crud.get_broadcasts(db, limit=5)
+    if not broadcasts:
+        await message.answer('Рассылок ещё не было')
+        return
+    await message.answer('\n\n'.join(progress_text(broadcast) for broadcast in broadcasts))
+
+
+@router.message(filters.Command(commands=['broadcast_cancel']))
+async def cancel_broadcast(message: Message, command: filters.CommandObject, db: AsyncSession):
+    """Отменить рассылку по номеру: /broadcast_cancel 3"""
+    if not command.args or not command.args.strip().isdigit():
+        await message.answer('Укажи номер рассылки: /broadcast_cancel 3')
+        return
+
+    broadcast_id = int(command.args)
+    if not await crud.cancel_broadcast(db, broadcast_id):
+        await message.answer(f'Рассылка #{broadcast_id} не найдена или уже закончилась')
+        return
+    await db.commit()
+    broadcaster.cancel(broadcast_id)
+    await message.answer(f'🛑 Рассылка #{broadcast_id} отменена')
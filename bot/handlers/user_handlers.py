@@ -3,58 +3,37 @@ import aiogram.types as types
 from aiogram.types import Message, CallbackQuery, WebAppInfo
 import aiogram.filters as filters
 from keyboards.inline import inline_start_bot, inline_main_menu, inline_create_pet
-from database import crud
-from database.engine import get_db
+from database import crud, rules
+from templates import screens
+from utils.messages import safe_edit_text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = Router()
 
 
 @router.message(filters.CommandStart())
-async def cmd_start(message: Message):
+async def cmd_start(message: Message, db: AsyncSession):
     """Команда /start - начало работы с ботом"""
 
-    # Получаем или создаем пользователя
-    db = get_db()
-    user = crud.get_or_create_user(
+    # Получаем или создаем пользователя и его питомца
+    user, pet = await crud.get_player(
         db,
         telegram_id=message.from_user.id,
         username=message.from_user.username,
         first_name=message.from_user.first_name
     )
 
-    # Проверяем, есть ли у пользователя питомцы
-    pets = crud.get_user_pets(db, user.id)
-
-    if not pets:
+    if not pet:
         # Если питомцев нет - предлагаем создать
         await message.answer(
-            f"""
-🌟 <b>Привет, {message.from_user.first_name}!</b>
-
-Добро пожаловать в <b>Pawer</b> - мир цифровых питомцев!
-
-Здесь ты сможешь:
-🐱 Вырастить своего уникального питомца
-💖 Заботиться о нём и играть вместе
-⚔️ Сражаться с другими игроками
-🎨 Кастомизировать внешний вид
-🏆 Достигать невероятных высот!
-
-<b>Давай создадим твоего первого питомца!</b>
-            """,
+            screens.welcome(message.from_user.first_name),
             reply_markup=inline_start_bot(),
             parse_mode='HTML'
         )
     else:
         # Если питомец уже есть - показываем главное меню
-        pet = pets[0]  # Берем первого питомца
         await message.answer(
-            f"""
-Привет снова, {message.from_user.first_name}! 👋
-
-Твой питомец <b>{pet.name}</b> ждёт тебя!
-Уровень: {pet.level} | Здоровье: {int(pet.health)}❤️
-            """,
+            screens.welcome_back(message.from_user.first_name, pet),
             reply_markup=inline_main_menu(),
             parse_mode='HTML'
         )
@@ -63,17 +42,9 @@ async def cmd_start(message: Message):
 @router.callback_query(F.data == 'create_pet')
 async def start_pet_creation(callback: CallbackQuery):
     """Начало создания питомца"""
-    await callback.message.edit_text(
-        """
-🎨 <b>Создание питомца - Шаг 1/3</b>
-
-<b>Выбери вид своего питомца:</b>
-
-🐱 <b>Киберкот</b> - ловкий и быстрый
-🐉 <b>Дракончик</b> - сильный и храбрый  
-☁️ <b>Облачко</b> - милое и доброе
-🤖 <b>Робопёс</b> - умный и верный
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.CREATE_PET,
         reply_markup=inline_create_pet(),
         parse_mode='HTML'
     )
@@ -101,15 +72,9 @@ async def choose_species(callback: CallbackQuery):
         'robo_dog': 'Робопёс'
     }
 
-    await callback.message.edit_text(
-        f"""
-✨ <b>Отличный выбор!</b>
-
-Твой {species_names[species]} {species_emojis[species]} готов к жизни!
-
-<b>Как назовём питомца?</b>
-Напиши имя в чат (например: Барсик, Дракоша, Пушок)
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.species_chosen(species_names[species], species_emojis[species]),
         parse_mode='HTML'
     )
 
@@ -117,11 +82,10 @@ async def choose_species(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.message(F.text, ~filters.Command())
-async def handle_pet_name(message: Message):
+@router.message(F.text, ~F.text.startswith('/'))
+async def handle_pet_name(message: Message, db: AsyncSession):
     """Обработка имени питомца"""
-    db = get_db()
-    user = crud.get_or_create_user(
+    user, pet = await crud.get_player(
         db,
         telegram_id=message.from_user.id,
         username=message.from_user.username,
@@ -129,9 +93,7 @@ async def handle_pet_name(message: Message):
     )
 
     # Проверяем, есть ли уже питомец
-    pets = crud.get_user_pets(db, user.id)
-
-    if pets:
+    if pet:
         # Если питомец уже есть, показываем кнопку Mini App
         await message.answer(
             "Используй кнопку ниже для управления питомцем! 👇",
@@ -143,7 +105,7 @@ async def handle_pet_name(message: Message):
     pet_name = message.text[:20]  # Ограничиваем длину имени
 
     # Создаем питомца (по умолчанию киберкот)
-    pet = crud.create_pet(
+    pet = await crud.create_pet(
         db,
         owner_id=user.id,
         name=pet_name,
@@ -154,68 +116,31 @@ async def handle_pet_name(message: Message):
     )
 
     # Даем стартовые предметы
-    # TODO: добавить стартовую еду в инвентарь
+    await crud.give_starter_items(db, user.id)
 
     await message.answer(
-        f"""
-🎉 <b>Поздравляю!</b>
-
-Твой питомец <b>{pet.name}</b> родился! 🐱✨
-
-<b>Стартовые характеристики:</b>
-❤️ Здоровье: {int(pet.health)}
-😊 Настроение: {int(pet.happiness)}
-🧠 Интеллект: {int(pet.intelligence)}
-⚡ Энергия: {int(pet.energy)}
-
-<b>Ты получил:</b>
-🪙 100 монет
-💎 10 кристаллов
-🍞 3x Хлеб (стартовая еда)
-
-Открой Mini App чтобы начать заботиться о питомце! 👇
-        """,
+        screens.pet_created(pet),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
 
 
 @router.callback_query(F.data == 'main_menu')
-async def show_main_menu(callback: CallbackQuery):
+async def show_main_menu(callback: CallbackQuery, db: AsyncSession):
     """Показать главное меню с Mini App"""
-    db = get_db()
-    user = crud.get_or_create_user(
-        db,
-        telegram_id=callback.from_user.id
-    )
-
-    pets = crud.get_user_pets(db, user.id)
+    user, pet = await crud.get_player(db, telegram_id=callback.from_user.id)
 
-    if not pets:
-        await callback.message.edit_text(
-            "У тебя пока нет питомца! Создай его:",
+    if not pet:
+        await safe_edit_text(
+            callback.message,
+            screens.NO_PET_MENU,
             reply_markup=inline_start_bot()
         )
         return
 
-    pet = pets[0]
-
-    await callback.message.edit_text(
-        f"""
-🏠 <b>Главное меню</b>
-
-<b>{pet.name}</b> - Уровень {pet.level}
-
-❤️ Здоровье: {int(pet.health)}
-😊 Настроение: {int(pet.happiness)}
-⚡ Энергия: {int(pet.energy)}
-
-💰 Твои ресурсы:
-🪙 {user.coins} монет
-💎 {user.crystals} кристаллов
-
-Открой приложение для полного управления! 👇
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.main_menu(user, pet),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
@@ -223,20 +148,16 @@ async def show_main_menu(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == 'quick_feed')
-async def quick_feed(callback: CallbackQuery):
+async def quick_feed(callback: CallbackQuery, db: AsyncSession):
     """Быстрое кормление (хлебом)"""
-    db = get_db()
-    user = crud.get_or_create_user(db, telegram_id=callback.from_user.id)
-    pets = crud.get_user_pets(db, user.id)
+    user, pet = await crud.get_player(db, telegram_id=callback.from_user.id)
 
-    if not pets:
+    if not pet:
         await callback.answer("Сначала создай питомца!", show_alert=True)
         return
 
-    pet = pets[0]
-
     # Даем базовую еду (хлеб: +10 здоровье, +5 счастье)
-    updated_pet = crud.update_pet_stats(
+    updated_pet = await crud.update_pet_stats(
         db,
         pet.id,
         health=10,
@@ -244,7 +165,7 @@ async def quick_feed(callback: CallbackQuery):
     )
 
     # Даем XP
-    xp_result = crud.add_pet_xp(db, pet.id, 10)
+    xp_result = await crud.add_pet_xp(db, pet.id, rules.FEED_XP)
 
     msg = f"🍞 {pet.name} покушал!\n"
     if xp_result['leveled_up']:
@@ -253,40 +174,25 @@ async def quick_feed(callback: CallbackQuery):
     await callback.answer(msg, show_alert=True)
 
     # Обновляем сообщение
-    await callback.message.edit_text(
-        f"""
-🏠 <b>Главное меню</b>
-
-<b>{updated_pet.name}</b> - Уровень {updated_pet.level}
-
-❤️ Здоровье: {int(updated_pet.health)}
-😊 Настроение: {int(updated_pet.happiness)}
-⚡ Энергия: {int(updated_pet.energy)}
-
-💰 Твои ресурсы:
-🪙 {user.coins} монет
-💎 {user.crystals} кристаллов
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.main_menu(user, updated_pet),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
 
 
 @router.callback_query(F.data == 'quick_play')
-async def quick_play(callback: CallbackQuery):
+async def quick_play(callback: CallbackQuery, db: AsyncSession):
     """Быстрая игра"""
-    db = get_db()
-    user = crud.get_or_create_user(db, telegram_id=callback.from_user.id)
-    pets = crud.get_user_pets(db, user.id)
+    user, pet = await crud.get_player(db, telegram_id=callback.from_user.id)
 
-    if not pets:
+    if not pet:
         await callback.answer("Сначала создай питомца!", show_alert=True)
         return
 
-    pet = pets[0]
-
     # Играем
-    result = crud.play_with_pet(db, pet.id, 'simple')
+    result = await crud.play_with_pet(db, pet.id, 'simple')
 
     if not result['success']:
         await callback.answer(result['message'], show_alert=True)
@@ -299,122 +205,49 @@ async def quick_play(callback: CallbackQuery):
     await callback.answer(msg, show_alert=True)
 
     # Обновляем данные
-    updated_pet = crud.get_pet_by_id(db, pet.id)
-
-    await callback.message.edit_text(
-        f"""
-🏠 <b>Главное меню</b>
-
-<b>{updated_pet.name}</b> - Уровень {updated_pet.level}
+    updated_pet = await crud.get_pet_by_id(db, pet.id)
 
-❤️ Здоровье: {int(updated_pet.health)}
-😊 Настроение: {int(updated_pet.happiness)}
-⚡ Энергия: {int(updated_pet.energy)}
-
-💰 Твои ресурсы:
-🪙 {user.coins} монет
-💎 {user.crystals} кристаллов
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.main_menu(user, updated_pet),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
 
 
-@router.callback_query(F.data == 'pet_stats')
-async def show_pet_stats(callback: CallbackQuery):
+@router.callback_query(F.data == 'pet_stats', flags={'db': 'read'})
+async def show_pet_stats(callback: CallbackQuery, db: AsyncSession):
     """Показать подробную статистику питомца"""
-    db = get_db()
-    user = crud.get_or_create_user(db, telegram_id=callback.from_user.id)
-    pets = crud.get_user_pets(db, user.id)
+    user, pet = await crud.get_player(db, telegram_id=callback.from_user.id, create=False)
 
-    if not pets:
+    if not pet:
         await callback.answer("У тебя нет питомца!", show_alert=True)
         return
+    skills = await crud.get_pet_skills(db, pet.id)
 
-    pet = pets[0]
-    skills = crud.get_pet_skills(db, pet.id)
-
-    # Вычисляем прогресс до следующего уровня
-    xp_needed = pet.level * 100
-    xp_progress = int((pet.xp / xp_needed) * 100)
-
-    skills_text = ""
-    if skills:
-        skills_text = "\n\n<b>🎯 Навыки:</b>\n"
-        for skill in skills[:5]:  # Показываем первые 5
-            skills_text += f"• {skill.skill_name} (ур. {skill.level})\n"
-
-    await callback.message.edit_text(
-        f"""
-📊 <b>Статистика питомца</b>
-
-<b>Имя:</b> {pet.name}
-<b>Вид:</b> {pet.species}
-<b>Характер:</b> {pet.personality}
-
-<b>⭐ Уровень {pet.level}</b>
-Опыт: {pet.xp}/{xp_needed} ({xp_progress}%)
-
-<b>📈 Характеристики:</b>
-❤️ Здоровье: {int(pet.health)}/100
-😊 Настроение: {int(pet.happiness)}/100
-🧠 Интеллект: {int(pet.intelligence)}/100
-⚡ Энергия: {int(pet.energy)}/100
-
-<b>🏆 Достижения:</b>
-🎮 Игр сыграно: {pet.total_games_played}
-⚔️ Побед в боях: {pet.battles_won}
-💀 Поражений: {pet.battles_lost}
-
-<b>🎭 Эволюция:</b>
-Стадия: {pet.evolution_stage}/4
-Путь: {pet.evolution_path}
-{skills_text}
-
-<i>Питомец с тобой уже {(callback.message.date - pet.created_at).days} дней</i>
-        """,
+    await safe_edit_text(
+        callback.message,
+        screens.pet_stats(pet, skills),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
     await callback.answer()
 
 
-@router.message(filters.Command(commands=['stats']))
-async def cmd_stats(message: Message):
+@router.message(filters.Command(commands=['stats']), flags={'db': 'read'})
+async def cmd_stats(message: Message, db: AsyncSession):
     """Команда для просмотра статистики"""
-    db = get_db()
-    user = crud.get_or_create_user(
-        db,
-        telegram_id=message.from_user.id
-    )
+    user, pet = await crud.get_player(db, telegram_id=message.from_user.id, create=False)
 
-    pets = crud.get_user_pets(db, user.id)
-
-    if not pets:
+    if not pet:
         await message.answer(
-            "У тебя пока нет питомца! Используй /start чтобы создать.",
+            screens.NO_PET_STATS,
             reply_markup=inline_start_bot()
         )
         return
 
-    pet = pets[0]
-
     await message.answer(
-        f"""
-📊 <b>Статистика</b>
-
-<b>👤 Игрок:</b>
-Имя: {user.first_name}
-Стрик логинов: {user.login_streak} дней 🔥
-🪙 Монеты: {user.coins}
-💎 Кристаллы: {user.crystals}
-
-<b>🐾 Питомец: {pet.name}</b>
-Уровень: {pet.level}
-❤️ {int(pet.health)} | 😊 {int(pet.happiness)} | ⚡ {int(pet.energy)}
-
-Используй Mini App для полного управления! 👇
-        """,
+        screens.player_stats(user, pet),
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
@@ -424,42 +257,7 @@ async def cmd_stats(message: Message):
 async def cmd_help(message: Message):
     """Справка по командам"""
     await message.answer(
-        """
-<b>📖 Справка по Pawer</b>
-
-<b>Основные команды:</b>
-/start - Начать или показать меню
-/stats - Посмотреть статистику
-/help - Эта справка
-
-<b>🎮 Как играть:</b>
-
-1️⃣ <b>Заботься о питомце</b>
-   • Корми его регулярно 🍕
-   • Играй с ним 🎮
-   • Давай отдыхать 😴
-
-2️⃣ <b>Качай уровень</b>
-   • Выполняй действия → получай XP
-   • Повышай уровень → открывай эволюции
-
-3️⃣ <b>Развивай питомца</b>
-   • Учи новым навыкам
-   • Экипируй предметы
-   • Кастомизируй внешний вид
-
-4️⃣ <b>Сражайся и побеждай</b>
-   • PvP бои с другими игроками
-   • Турниры с крутыми призами
-   • Босс-рейды вместе с друзьями
-
-<b>💡 Советы:</b>
-• Заходи каждый день для бонусов
-• Не забывай кормить питомца
-• Участвуй в ивентах для наград
-
-<b>Открой Mini App для полного функционала! 👇</b>
-        """,
+        screens.HELP,
         reply_markup=inline_main_menu(),
         parse_mode='HTML'
     )
\ No newline at end of file
@@ -1,7 +1,73 @@
-from aiogram.types import InlineKeyboardMarkup, WebAppInfo
+"""
+Inline-клавиатуры
+
+Клавиатура собирается один раз и дальше отдаётся общий экземпляр: функции
+обёрнуты в frozen_keyboard (LRU-кэш по аргументам + заморозка). Общий
+экземпляр нельзя испортить - кнопки и сама разметка неизменяемы, ряды
+списков не меняются. Чтобы дополнить клавиатуру, копируй её:
+InlineKeyboardBuilder.from_markup(inline_main_menu()).
+"""
+import copy
+from functools import lru_cache, wraps
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from pydantic import ConfigDict
 
+MINI_APP_URL = 'https://lovestove.github.io/Pawer/'
 
+
+class _FrozenList(list):
+    """Список, который нельзя изменить; копии - обычные списки"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Клавиатура общая для всех - скопируй её перед изменением')
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(item, memo) for item in self]
+
+
+class FrozenInlineKeyboardButton(InlineKeyboardButton):
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    model_config = ConfigDict(frozen=True)
+
+
+def freeze(markup: InlineKeyboardMarkup) -> FrozenInlineKeyboardMarkup:
+    """Неизменяемая копия разметки"""
+    frozen = FrozenInlineKeyboardMarkup(inline_keyboard=[
+        [FrozenInlineKeyboardButton(**button.model_dump(exclude_none=True)) for button in row]
+        for row in markup.inline_keyboard
+    ])
+    # Валидация pydantic превращает ряды в обычные списки - подменяем уже после неё
+    rows = _FrozenList(_FrozenList(row) for row in frozen.inline_keyboard)
+    object.__setattr__(frozen, 'inline_keyboard', rows)
+    return frozen
+
+
+def frozen_keyboard(maxsize: int = 128):
+    """Декоратор: собрать клавиатуру один раз для каждого набора аргументов
+
+    Аргументы должны быть хэшируемыми; в кэше не больше maxsize клавиатур.
+    """
+    def decorator(build):
+        @lru_cache(maxsize=maxsize)
+        @wraps(build)
+        def cached(*args, **kwargs) -> FrozenInlineKeyboardMarkup:
+            return freeze(build(*args, **kwargs))
+        return cached
+    return decorator
+
+
+@frozen_keyboard()
 def inline_start_bot() -> InlineKeyboardMarkup:
     """Стартовая клавиатура"""
     kb = InlineKeyboardBuilder()
@@ -12,6 +78,7 @@ def inline_start_bot() -> InlineKeyboardMarkup:
     return kb.as_markup()
 
 
+@frozen_keyboard()
 def inline_create_pet() -> InlineKeyboardMarkup:
     """Клавиатура выбора вида питомца"""
     kb = InlineKeyboardBuilder()
@@ -26,14 +93,15 @@ def inline_create_pet() -> InlineKeyboardMarkup:
     return kb.as_markup()
 
 
-def inline_main_menu() -> InlineKeyboardMarkup:
-    """Главное меню с Mini App и быстрыми действиями"""
+@frozen_keyboard()
+def inline_main_menu(admin: bool = False) -> InlineKeyboardMarkup:
+    """Главное меню с Mini App и быстрыми действиями (admin=True - с админ-кнопкой)"""
     kb = InlineKeyboardBuilder()
 
     # Главная кнопка - открыть Mini App
     kb.button(
         text='🎮 Открыть приложение',
-        web_app=WebAppInfo(url='https://lovestove.github.io/Pawer/')
+        web_app=WebAppInfo(url=MINI_APP_URL)
     )
 
     # Быстрые действия
@@ -43,28 +111,16 @@ def inline_main_menu() -> InlineKeyboardMarkup:
     # Статистика
     kb.button(text='📊 Статистика', callback_data='pet_stats')
 
-    kb.adjust(1, 2, 1)
+    if admin:
+        # Админские кнопки
+        kb.button(text='⚙️ Админ панель', callback_data='admin_panel')
+        kb.adjust(1, 2, 1, 1)
+    else:
+        kb.adjust(1, 2, 1)
 
     return kb.as_markup()
 
 
 def inline_main_menu_admin() -> InlineKeyboardMarkup:
     """Админское меню"""
-    kb = InlineKeyboardBuilder()
-
-    # Добавляем обычное меню
-    kb.button(
-        text='🎮 Открыть приложение',
-        web_app=WebAppInfo(url='https://lovestove.github.io/Pawer/')
-    )
-
-    kb.button(text='🍞 Быстро покормить', callback_data='quick_feed')
-    kb.button(text='🎯 Быстро поиграть', callback_data='quick_play')
-    kb.button(text='📊 Статистика', callback_data='pet_stats')
-
-    # Админские кнопки
-    kb.button(text='⚙️ Админ панель', callback_data='admin_panel')
-
-    kb.adjust(1, 2, 1, 1)
-
-    return kb.as_markup()
\ No newline at end of file
+    return inline_main_menu(admin=True)
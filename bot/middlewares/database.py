@@ -0,0 +1,96 @@
+"""
+Сессия БД на время обработки апдейта
+
+Пишущее соединение одно на процесс (SQLite всё равно пишет по одному),
+поэтому его нельзя держать, пока хендлер ждёт ответа от Telegram: иначе
+все апдейты с записью выстраиваются в очередь за сетевыми задержками.
+CommitBeforeRequest коммитит пишущую сессию апдейта перед каждым запросом
+к Telegram - соединение возвращается в пул, а ответ пользователю уходит
+уже после того, как изменения сохранены.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.engine import async_session, read_session
+
+
+class _WriteScope:
+    """Пишущая сессия апдейта; commit под замком - запросы могут идти через gather"""
+
+    __slots__ = ('db', 'lock')
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.lock = asyncio.Lock()
+
+    async def commit(self):
+        async with self.lock:
+            if self.db.in_transaction():
+                await self.db.commit()
+
+
+current_write = ContextVar('current_write', default=None)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Открывает одну сессию на апдейт и коммитит её в конце
+
+    Хендлер получает сессию аргументом db. Запросы к Telegram коммитят
+    сделанное до них (CommitBeforeRequest); если хендлер упал - откатывается
+    то, что записано после последнего запроса. Хендлеры с флагом db='read'
+    получают сессию из пула только для чтения и не ждут пишущее соединение.
+    Флаги видны только внутренним middleware роутера, поэтому
+    подключается на message и callback_query, а не на update.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker = async_session,
+                 read_pool: async_sessionmaker = read_session):
+        self.session_pool = session_pool
+        self.read_pool = read_pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if get_flag(data, 'db') == 'read':
+            async with self.read_pool() as db:
+                data['db'] = db
+                return await handler(event, data)
+
+        async with self.session_pool() as db:
+            data['db'] = db
+            scope = _WriteScope(db)
+            token = current_write.set(scope)
+            try:
+                result = await handler(event, data)
+            finally:
+                current_write.reset(token)
+            await scope.commit()
+            return result
+
+
+class CommitBeforeRequest(BaseRequestMiddleware):
+    """Request-middleware сессии бота: коммит записи апдейта перед запросом к Telegram
+
+    Регистрируется раньше sender, чтобы соединение освобождалось и на время
+    ожидания в очереди отправки. Вне апдейта (рассылки, напоминания) ничего
+    не делает - там сессии закрываются до отправки.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        scope = current_write.get()
+        if scope is not None:
+            await scope.commit()
+        return await make_request(bot, method)
+
+
+commit_before_request = CommitBeforeRequest()
@@ -0,0 +1,95 @@
+"""
+Порядок апдейтов одного пользователя
+
+Апдейты разных пользователей обрабатываются параллельно, а апдейты одного
+пользователя - строго по очереди: два быстрых нажатия quick_feed не читают
+одну и ту же строку питомца одновременно.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config_reader import config
+
+logger = logging.getLogger(__name__)
+
+
+class _UserQueue:
+    """Замок пользователя и число его апдейтов (в обработке + ожидающих)"""
+
+    __slots__ = ('lock', 'size')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.size = 0
+
+
+class UserOrderingMiddleware(BaseMiddleware):
+    """Outer-middleware на dp.update: по одному апдейту на пользователя за раз
+
+    Замки лежат в shards словарях по user_id % shards и удаляются, как только
+    у пользователя не осталось апдейтов, поэтому память растёт только с числом
+    активных пользователей. asyncio.Lock отдаёт замок в порядке очереди, так
+    что апдейты пользователя идут в порядке поступления. Если у пользователя
+    уже queue_limit апдейтов, новые отбрасываются.
+    """
+
+    def __init__(self, shards: int = 64, queue_limit: int = 10):
+        self.queue_limit = queue_limit
+        self.dropped = 0
+        self._shards = [{} for _ in range(shards)]
+        self._depths = [0] * shards
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        index = user.id % len(self._shards)
+        shard = self._shards[index]
+        queue = shard.get(user.id)
+        if queue is None:
+            queue = shard[user.id] = _UserQueue()
+        elif queue.size >= self.queue_limit:
+            self.dropped += 1
+            logger.warning('Очередь пользователя %s переполнена, апдейт пропущен', user.id)
+            return None
+
+        queue.size += 1
+        self._depths[index] += 1
+        try:
+            async with queue.lock:
+                return await handler(event, data)
+        finally:
+            queue.size -= 1
+            self._depths[index] -= 1
+            if not queue.size:
+                del shard[user.id]
+
+    def depths(self) -> list:
+        """Апдейтов в каждом шарде (в обработке + ожидающих)"""
+        return list(self._depths)
+
+    def stats(self) -> dict:
+        """Сводка для /healthz и /queues"""
+        busy = sum(len(shard) for shard in self._shards)
+        queued = sum(self._depths)
+        return {
+            'users': busy,
+            'queued': queued,
+            'waiting': queued - busy,
+            'max_shard_depth': max(self._depths),
+            'dropped': self.dropped,
+        }
+
+
+# Один экземпляр на процесс: его же читают /healthz и /queues
+user_ordering = UserOrderingMiddleware(config.UPDATE_SHARDS, config.USER_QUEUE_LIMIT)
@@ -0,0 +1,84 @@
+"""
+Ограничение частоты нажатий на кнопки действий
+
+Каждое кормление или игра - несколько записей в SQLite и два запроса к
+Telegram. Лишние нажатия отсекаются до очереди пользователя и до сессии БД.
+"""
+import time
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config_reader import config
+from utils.cache import TTLCache
+
+# rate - токенов в секунду, burst - сколько нажатий подряд можно сделать сразу
+Limit = namedtuple('Limit', ['rate', 'burst'])
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Outer-middleware на dp.update с корзиной токенов на (пользователь, кнопка)
+
+    limits: callback_data или её начало -> Limit. Корзина хранится в TTLCache
+    ровно столько, сколько ей нужно, чтобы наполниться заново: устаревшая
+    запись и полная корзина - одно и то же, поэтому память занимают только
+    недавно нажимавшие. Лишнее нажатие получает короткий answer без БД.
+    """
+
+    def __init__(self, limits: dict, maxsize: int = 50000, message: str = '⏳ Не так быстро!',
+                 timer=time.monotonic):
+        self.limits = {key: Limit(*value) for key, value in limits.items()}
+        self.message = message
+        self.throttled = 0
+        self._timer = timer
+        self._buckets = TTLCache(maxsize=maxsize, timer=timer)
+
+    def _limit_for(self, data: str):
+        limit = self.limits.get(data)
+        if limit is None:
+            for key, value in self.limits.items():
+                if data.startswith(key):
+                    return key, value
+            return None, None
+        return data, limit
+
+    def allow(self, user_id: int, data: str) -> bool:
+        """Списать токен за нажатие; False - корзина пуста"""
+        key, limit = self._limit_for(data or '')
+        if limit is None:
+            return True
+
+        now = self._timer()
+        bucket = (user_id, key)
+        tokens, updated = self._buckets.get(bucket, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+        if tokens < 1:
+            self._buckets.set(bucket, (tokens, now), ttl=(limit.burst - tokens) / limit.rate)
+            return False
+
+        tokens -= 1
+        self._buckets.set(bucket, (tokens, now), ttl=(limit.burst - tokens) / limit.rate)
+        return True
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None or self.allow(callback.from_user.id, callback.data):
+            return await handler(event, data)
+
+        self.throttled += 1
+        await callback.answer(self.message)
+        return None
+
+    def stats(self) -> dict:
+        return {'throttled': self.throttled, 'buckets': len(self._buckets)}
+
+
+# Один экземпляр на процесс, настройки - THROTTLE_* в config_reader
+throttling = ThrottlingMiddleware(config.THROTTLE_LIMITS, config.THROTTLE_CACHE_SIZE)
@@ -0,0 +1,184 @@
+"""baseline: схема и индексы для горячих запросов
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Создаёт таблицы, которых ещё нет, поэтому подходит и для новой БД,
+и для БД, созданной раньше через Base.metadata.create_all.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    # (имя, таблица, колонки, unique)
+    ('ix_pets_owner_id', 'pets', ['owner_id'], False),
+    ('uq_user_items_user_item', 'user_items', ['user_id', 'item_id'], True),
+    ('uq_pet_skills_pet_skill', 'pet_skills', ['pet_id', 'skill_name'], True),
+    ('ix_quests_user_completed', 'quests', ['user_id', 'completed'], False),
+)
+
+
+def _create_tables(existing):
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('telegram_id', sa.Integer(), nullable=False, unique=True),
+            sa.Column('username', sa.String(255)),
+            sa.Column('first_name', sa.String(255)),
+            sa.Column('coins', sa.Integer()),
+            sa.Column('crystals', sa.Integer()),
+            sa.Column('is_premium', sa.Boolean()),
+            sa.Column('premium_until', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('last_active', sa.DateTime()),
+            sa.Column('login_streak', sa.Integer()),
+            sa.Column('last_login_date', sa.DateTime()),
+        )
+
+    if 'items' not in existing:
+        op.create_table(
+            'items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('description', sa.Text()),
+            sa.Column('item_type', sa.String(50), nullable=False),
+            sa.Column('rarity', sa.String(50)),
+            sa.Column('health_effect', sa.Float()),
+            sa.Column('happiness_effect', sa.Float()),
+            sa.Column('intelligence_effect', sa.Float()),
+            sa.Column('energy_effect', sa.Float()),
+            sa.Column('stat_bonus', sa.String(200)),
+            sa.Column('coin_price', sa.Integer()),
+            sa.Column('crystal_price', sa.Integer()),
+            sa.Column('icon_emoji', sa.String(10)),
+            sa.Column('image_url', sa.String(500), nullable=True),
+        )
+
+    if 'pets' not in existing:
+        op.create_table(
+            'pets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('species', sa.String(50), nullable=False),
+            sa.Column('personality', sa.String(50), nullable=False),
+            sa.Column('color', sa.String(50)),
+            sa.Column('pattern', sa.String(50)),
+            sa.Column('image_url', sa.String(500), nullable=True),
+            sa.Column('health', sa.Float()),
+            sa.Column('happiness', sa.Float()),
+            sa.Column('intelligence', sa.Float()),
+            sa.Column('energy', sa.Float()),
+            sa.Column('level', sa.Integer()),
+            sa.Column('xp', sa.Integer()),
+            sa.Column('evolution_stage', sa.Integer()),
+            sa.Column('evolution_path', sa.String(50)),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('last_fed', sa.DateTime()),
+            sa.Column('last_played', sa.DateTime()),
+            sa.Column('last_sleep', sa.DateTime()),
+            sa.Column('stats_updated_at', sa.DateTime()),
+            sa.Column('total_games_played', sa.Integer()),
+            sa.Column('battles_won', sa.Integer()),
+            sa.Column('battles_lost', sa.Integer()),
+        )
+    else:
+        columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('pets')}
+        if 'stats_updated_at' not in columns:
+            op.add_column('pets', sa.Column('stats_updated_at', sa.DateTime()))
+
+    if 'pet_skills' not in existing:
+        op.create_table(
+            'pet_skills',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('pet_id', sa.Integer(), sa.ForeignKey('pets.id'), nullable=False),
+            sa.Column('skill_name', sa.String(100), nullable=False),
+            sa.Column('skill_type', sa.String(50)),
+            sa.Column('level', sa.Integer()),
+            sa.Column('learned_at', sa.DateTime()),
+        )
+
+    if 'user_items' not in existing:
+        op.create_table(
+            'user_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id'), nullable=False),
+            sa.Column('quantity', sa.Integer()),
+            sa.Column('obtained_at', sa.DateTime()),
+        )
+
+    if 'pet_equipment' not in existing:
+        op.create_table(
+            'pet_equipment',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('pet_id', sa.Integer(), sa.ForeignKey('pets.id'), nullable=False),
+            sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id'), nullable=False),
+            sa.Column('slot', sa.String(50)),
+            sa.Column('equipped_at', sa.DateTime()),
+        )
+
+    if 'quests' not in existing:
+        op.create_table(
+            'quests',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('quest_type', sa.String(50), nullable=False),
+            sa.Column('progress', sa.Integer()),
+            sa.Column('target', sa.Integer(), nullable=False),
+            sa.Column('completed', sa.Boolean()),
+            sa.Column('reward_coins', sa.Integer()),
+            sa.Column('reward_xp', sa.Integer()),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+        )
+
+
+def _merge_duplicates():
+    """Склеить дубли, которые могла оставить старая проверка перед вставкой
+
+    Иначе уникальные индексы ниже не создадутся. Остаётся строка с меньшим id:
+    в user_items ей достаётся сумма количеств, в pet_skills - наибольший уровень.
+    """
+    op.execute(
+        'UPDATE user_items SET quantity = ('
+        ' SELECT SUM(COALESCE(dup.quantity, 0)) FROM user_items AS dup'
+        ' WHERE dup.user_id = user_items.user_id AND dup.item_id = user_items.item_id)'
+        ' WHERE id IN (SELECT MIN(id) FROM user_items GROUP BY user_id, item_id HAVING COUNT(*) > 1)'
+    )
+    op.execute(
+        'DELETE FROM user_items WHERE id NOT IN (SELECT MIN(id) FROM user_items GROUP BY user_id, item_id)'
+    )
+    op.execute(
+        'UPDATE pet_skills SET level = ('
+        ' SELECT MAX(dup.level) FROM pet_skills AS dup'
+        ' WHERE dup.pet_id = pet_skills.pet_id AND dup.skill_name = pet_skills.skill_name)'
+        ' WHERE id IN (SELECT MIN(id) FROM pet_skills GROUP BY pet_id, skill_name HAVING COUNT(*) > 1)'
+    )
+    op.execute(
+        'DELETE FROM pet_skills WHERE id NOT IN (SELECT MIN(id) FROM pet_skills GROUP BY pet_id, skill_name)'
+    )
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _create_tables(existing)
+    _merge_duplicates()
+
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    for table in ('quests', 'pet_equipment', 'user_items', 'pet_skills', 'pets', 'items', 'users'):
+        op.drop_table(table)
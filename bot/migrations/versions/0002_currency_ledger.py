@@ -0,0 +1,31 @@
+"""currency_ledger: журнал изменений баланса
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'currency_ledger',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('coins_delta', sa.Integer()),
+        sa.Column('crystals_delta', sa.Integer()),
+        sa.Column('reason', sa.String(50)),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_currency_ledger_user_id', 'currency_ledger', ['user_id'])
+
+
+def downgrade():
+    op.drop_index('ix_currency_ledger_user_id', table_name='currency_ledger')
+    op.drop_table('currency_ledger')
@@ -0,0 +1,36 @@
+"""broadcasts: рассылки с сохранённым курсором
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'broadcasts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(20)),
+        sa.Column('created_by', sa.Integer()),
+        sa.Column('report_chat_id', sa.Integer()),
+        sa.Column('report_message_id', sa.Integer()),
+        sa.Column('last_user_id', sa.Integer()),
+        sa.Column('total', sa.Integer()),
+        sa.Column('sent', sa.Integer()),
+        sa.Column('blocked', sa.Integer()),
+        sa.Column('failed', sa.Integer()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('finished_at', sa.DateTime()),
+    )
+
+
+def downgrade():
+    op.drop_table('broadcasts')
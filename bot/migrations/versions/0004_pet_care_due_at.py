@@ -0,0 +1,94 @@
+"""pet_care_due_at: срок напоминания о питомце
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Срок для уже существующих питомцев считается здесь же, пакетами по ID.
+Формула и порог - замороженная копия database/decay.stat_reaches и
+CARE_NOTIFY_THRESHOLD на момент миграции: код приложения может измениться,
+а результат миграции - нет. Дальше сроки пересчитывает само приложение.
+"""
+import math
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 1000
+
+DECAY_INTERVAL = 3600
+CARE_THRESHOLD = 25.0
+# (стат, часы последнего ухода, порог в секундах, снижение за тик, минимум)
+CARE_RULES = (
+    ('health', 'last_fed', 4 * 3600, 5, 5),
+    ('happiness', 'last_played', 6 * 3600, 5, 5),
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(moment):
+    return int((moment - _EPOCH).total_seconds())
+
+
+def _tick(ticks):
+    return _EPOCH + timedelta(seconds=ticks * DECAY_INTERVAL)
+
+
+def _care_due_at(row, now):
+    """Ближайший тик, на котором здоровье или настроение опустится до порога"""
+    since = row.stats_updated_at or row.created_at or now
+    deadlines = []
+    for stat, clock, threshold, amount, floor in CARE_RULES:
+        value = getattr(row, stat)
+        if value is None:
+            continue
+        if value <= CARE_THRESHOLD:
+            deadlines.append(_tick(_seconds(since) // DECAY_INTERVAL + 1))
+        elif floor <= CARE_THRESHOLD:
+            start = max(_seconds(since), _seconds(getattr(row, clock) or since) + threshold)
+            ticks = math.ceil((value - CARE_THRESHOLD) / amount)
+            deadlines.append(_tick(start // DECAY_INTERVAL + ticks))
+    return min(deadlines, default=None)
+
+
+def upgrade():
+    op.add_column('pets', sa.Column('care_due_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_pets_care_due_at', 'pets', ['care_due_at'])
+
+    pets = sa.table(
+        'pets',
+        sa.column('id', sa.Integer()),
+        sa.column('health', sa.Float()),
+        sa.column('happiness', sa.Float()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('last_fed', sa.DateTime()),
+        sa.column('last_played', sa.DateTime()),
+        sa.column('stats_updated_at', sa.DateTime()),
+        sa.column('care_due_at', sa.DateTime()),
+    )
+    connection = op.get_bind()
+    now = datetime.now()
+    after_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(pets).where(pets.c.id > after_id).order_by(pets.c.id).limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            pets.update().where(pets.c.id == sa.bindparam('pet_id')),
+            [{'pet_id': row.id, 'care_due_at': _care_due_at(row, now)} for row in rows],
+        )
+        after_id = rows[-1].id
+
+
+def downgrade():
+    op.drop_index('ix_pets_care_due_at', table_name='pets')
+    op.drop_column('pets', 'care_due_at')
@@ -0,0 +1,34 @@
+"""webapp_actions: ключи идемпотентности действий из Mini App
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'webapp_actions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(64), nullable=False),
+        sa.Column('action', sa.String(20)),
+        sa.Column('result', sa.Text()),
+        sa.Column('client_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('uq_webapp_actions_user_key', 'webapp_actions', ['user_id', 'key'], unique=True)
+    op.create_index('ix_webapp_actions_created_at', 'webapp_actions', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_webapp_actions_created_at', table_name='webapp_actions')
+    op.drop_index('uq_webapp_actions_user_key', table_name='webapp_actions')
+    op.drop_table('webapp_actions')
@@ -1,28 +1,19 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.enums.parse_mode import ParseMode
-from aiogram.client.default import DefaultBotProperties
 
-from config_reader import config
-from bot.handlers import user_handlers, admin_handlers
+from bootstrap import create_bot, create_dispatcher, prepare, run_bot
 
 logging.basicConfig(level=logging.INFO)
 
 async def main():
 
-    bot = Bot(token=config.BOT_TOKEN.get_secret_value(),
-              default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    await prepare()
 
-    dp = Dispatcher()
+    bot = create_bot()
+    dp = create_dispatcher()
 
-    dp.include_router(admin_handlers.router)
-    dp.include_router(user_handlers.router)
-
-    await bot.delete_webhook(drop_pending_updates=True)
-
-    await dp.start_polling(bot)
+    await run_bot(bot, dp)
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
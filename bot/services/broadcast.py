@@ -0,0 +1,208 @@
+"""
+Рассылка сообщения всем пользователям
+
+Получатели читаются страницами по users.id (keyset, без OFFSET и без
+загрузки всей таблицы), в памяти - только текущая страница. Сообщения уходят
+через общий лимит sender в полосе BROADCAST, поэтому ответы игрокам во
+время рассылки не задерживаются.
+
+После каждой страницы курсор и счётчики пишутся в таблицу broadcasts.
+При остановке бота сохраняется непрерывно обработанное начало страницы,
+а на старте незавершённые рассылки продолжаются с курсора. Повторно
+может уйти лишь несколько сообщений, отправленных в момент остановки.
+"""
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError
+
+from config_reader import config
+from database import crud
+from database.engine import get_db, read_session
+from services.sender import BROADCAST, INTERACTIVE, send_lane
+
+logger = logging.getLogger(__name__)
+
+# Исходы доставки одному получателю
+SENT = 'sent'
+BLOCKED = 'blocked'
+FAILED = 'failed'
+
+STATUS_NAMES = {'running': 'идёт', 'done': 'завершена', 'cancelled': 'отменена'}
+
+
+class _Progress:
+    __slots__ = ('id', 'status', 'total', 'last_user_id', 'sent', 'blocked', 'failed')
+
+    def __init__(self, broadcast):
+        for name in self.__slots__:
+            setattr(self, name, getattr(broadcast, name) or 0)
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.blocked + self.failed
+
+    def add(self, outcomes):
+        for outcome in outcomes:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+
+def progress_text(broadcast, rate: float = None) -> str:
+    """Строка прогресса рассылки (подходит и для модели, и для _Progress)"""
+    done = (broadcast.sent or 0) + (broadcast.blocked or 0) + (broadcast.failed or 0)
+    percent = min(100, done * 100 // broadcast.total) if broadcast.total else 100
+    text = (
+        f'📣 Рассылка #{broadcast.id}: {STATUS_NAMES.get(broadcast.status, broadcast.status)}\n'
+        f'Обработано: {done}/{broadcast.total} ({percent}%)\n'
+        f'✅ {broadcast.sent or 0} | 🚫 {broadcast.blocked or 0} | ❌ {broadcast.failed or 0}'
+    )
+    if rate is not None:
+        text += f'\nСкорость: {rate:.1f} сообщ./с'
+    return text
+
+
+class Broadcaster:
+    """Запускает рассылки фоновыми задачами, по одной задаче на рассылку"""
+
+    def __init__(self, batch_size: int = 500, concurrency: int = 25, report_interval: float = 10.0):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.report_interval = report_interval
+        self._tasks = {}
+
+    def start(self, bot: Bot, broadcast_id: int) -> asyncio.Task:
+        """Запустить (или продолжить) рассылку; курсор берётся из БД"""
+        task = self._tasks.get(broadcast_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._run(bot, broadcast_id), name=f'broadcast_{broadcast_id}')
+            self._tasks[broadcast_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+        return task
+
+    def cancel(self, broadcast_id: int) -> bool:
+        """Остановить задачу рассылки (статус в БД меняет вызывающий код)"""
+        task = self._tasks.get(broadcast_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def running(self) -> list:
+        """ID рассылок, которые сейчас отправляются"""
+        return sorted(self._tasks)
+
+    async def resume(self, bot: Bot):
+        """Продолжить незавершённые рассылки (подходит для dp.startup)"""
+        async with read_session() as db:
+            broadcasts = await crud.get_broadcasts(db, status='running')
+        for broadcast in broadcasts:
+            logger.info('📣 Продолжаю рассылку #%d с users.id > %d', broadcast.id, broadcast.last_user_id or 0)
+            self.start(bot, broadcast.id)
+
+    async def stop(self):
+        """Остановить все рассылки, сохранив курсор (подходит для dp.shutdown)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # === ОТПРАВКА ===
+
+    async def _run(self, bot: Bot, broadcast_id: int):
+        async with read_session() as db:
+            broadcast = await crud.get_broadcast(db, broadcast_id)
+            if broadcast is None or broadcast.status != 'running':
+                return
+            text = broadcast.text
+            report_to = (broadcast.report_chat_id, broadcast.report_message_id)
+            progress = _Progress(broadcast)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        done_at_start = progress.done
+        reported = started
+
+        def rate() -> float:
+            return (progress.done - done_at_start) / max(time.monotonic() - started, 1e-9)
+
+        with send_lane(BROADCAST):
+            while True:
+                async with read_session() as db:
+                    page = await crud.get_user_ids_page(db, progress.last_user_id, self.batch_size)
+                if not page:
+                    break
+
+                outcomes = [None] * len(page)
+                try:
+                    await asyncio.gather(*(
+                        self._deliver(bot, telegram_id, text, semaphore, outcomes, index)
+                        for index, (_, telegram_id) in enumerate(page)
+                    ))
+                except asyncio.CancelledError:
+                    # Сохраняем только непрерывно обработанное начало страницы
+                    finished = next((index for index, outcome in enumerate(outcomes) if outcome is None), len(page))
+                    if finished:
+                        progress.add(outcomes[:finished])
+                        progress.last_user_id = page[finished - 1].id
+                        await self._save(progress)
+                    logger.info('📣 Рассылка #%d остановлена на users.id %d', broadcast_id, progress.last_user_id)
+                    raise
+
+                progress.add(outcomes)
+                progress.last_user_id = page[-1].id
+                await self._save(progress)
+
+                if time.monotonic() - reported >= self.report_interval:
+                    reported = time.monotonic()
+                    await self._report(bot, report_to, progress_text(progress, rate()))
+
+        progress.status = 'done'
+        await self._save(progress, status='done')
+        logger.info(
+            '📣 Рассылка #%d завершена: отправлено %d, заблокировали %d, ошибок %d, %.1f сообщ./с',
+            broadcast_id, progress.sent, progress.blocked, progress.failed, rate()
+        )
+        await self._report(bot, report_to, progress_text(progress, rate()))
+
+    async def _deliver(self, bot: Bot, chat_id: int, text: str, semaphore: asyncio.Semaphore,
+                       outcomes: list, index: int):
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id, text)
+                outcomes[index] = SENT
+            except TelegramForbiddenError:
+                outcomes[index] = BLOCKED
+            except TelegramBadRequest as error:
+                # Чат удалён или пользователь деактивирован - это не сбой рассылки
+                outcomes[index] = BLOCKED if 'chat not found' in error.message.lower() else FAILED
+            except TelegramAPIError as error:
+                logger.warning('Рассылка: не доставлено в %s: %s', chat_id, error)
+                outcomes[index] = FAILED
+
+    @staticmethod
+    async def _save(progress: _Progress, status: str = None):
+        # Статус пишем только в конце: отмена из admin_handlers не должна затираться
+        async with get_db() as db:
+            await crud.save_broadcast_progress(
+                db, progress.id, progress.last_user_id, progress.sent, progress.blocked, progress.failed,
+                status=status,
+            )
+            await db.commit()
+
+    @staticmethod
+    async def _report(bot: Bot, report_to, text: str):
+        chat_id, message_id = report_to
+        if not chat_id or not message_id:
+            return
+        # Отчёт админу не должен стоять в очереди за самой рассылкой
+        with send_lane(INTERACTIVE):
+            try:
+                await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+            except TelegramAPIError as error:
+                logger.debug('Не удалось обновить отчёт о рассылке: %s', error)
+
+
+# Один на процесс: команды в admin_handlers, продолжение после рестарта - в dp.startup
+broadcaster = Broadcaster(config.BROADCAST_BATCH_SIZE, config.BROADCAST_CONCURRENCY, config.BROADCAST_REPORT_INTERVAL)
@@ -0,0 +1,112 @@
+"""
+Напоминания владельцам, когда питомцу плохо
+
+Планировщик не обходит питомцев: срок каждого уже лежит в pets.care_due_at
+(database/care.py). Он спит до ближайшего срока (MIN по индексу), забирает
+только тех, кому пора, и снова засыпает. Сон ограничен CARE_MAX_SLEEP, чтобы
+заметить новых питомцев - их сроки наступают не раньше чем через несколько
+часов, так что напоминание не опаздывает.
+
+Срок сбрасывается в одной транзакции с выборкой, а сообщения уходят после
+commit через полосу NOTIFICATION: при падении бота напоминание может
+потеряться, но не придёт дважды.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from config_reader import config
+from database import crud
+from database.care import care_due_at, low_stats
+from database.engine import get_db
+from keyboards.inline import inline_main_menu
+from services.sender import NOTIFICATION, send_lane
+from templates import screens
+
+logger = logging.getLogger(__name__)
+
+
+class CareNotifier:
+    """Фоновая задача напоминаний (start/stop подходят для dp.startup/dp.shutdown)"""
+
+    def __init__(self, batch_size: int = 100, max_sleep: float = 300.0):
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self.sent = 0
+        self._task = None
+
+    async def start(self, bot: Bot):
+        self._task = asyncio.create_task(self._run(bot), name='care_notifier')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, bot: Bot):
+        while True:
+            try:
+                delay = await self.run_once(bot)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Ошибка при отправке напоминаний')
+                delay = self.max_sleep
+            await asyncio.sleep(delay)
+
+    async def run_once(self, bot: Bot, now: datetime = None) -> float:
+        """Разослать все наступившие напоминания; возвращает, сколько спать до следующих"""
+        now = now or datetime.now()
+        while True:
+            reminders, full = await self._take_due(now)
+            await self._send(bot, reminders)
+            if not full:
+                break
+
+        async with get_db() as db:
+            next_due = await crud.get_next_care_due(db)
+        if next_due is None:
+            return self.max_sleep
+        return min(self.max_sleep, max(0.0, (next_due - datetime.now()).total_seconds()))
+
+    async def _take_due(self, now: datetime):
+        """Забрать пакет наступивших сроков: (напоминания, был ли пакет полным)"""
+        reminders = []
+        async with get_db() as db:
+            rows = await crud.get_due_pets(db, now, self.batch_size)
+            for pet, telegram_id in rows:
+                stats = low_stats(pet)
+                if stats:
+                    reminders.append((telegram_id, screens.care_reminder(pet, stats)))
+                    # Следующее напоминание - после того, как о питомце позаботятся
+                    pet.care_due_at = None
+                else:
+                    # Срок устарел (например, статы меняли в обход ORM) - пересчитываем
+                    pet.care_due_at = care_due_at(pet, now)
+            await db.commit()
+        return reminders, len(rows) == self.batch_size
+
+    async def _send(self, bot: Bot, reminders: list):
+        if not reminders:
+            return
+        with send_lane(NOTIFICATION):
+            results = await asyncio.gather(
+                *(bot.send_message(chat_id, text, reply_markup=inline_main_menu()) for chat_id, text in reminders),
+                return_exceptions=True,
+            )
+        for (chat_id, _), result in zip(reminders, results):
+            if isinstance(result, TelegramAPIError):
+                logger.debug('Напоминание для %s не доставлено: %s', chat_id, result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self.sent += 1
+        logger.info('🔔 Напоминаний о питомцах: %d', len(reminders))
+
+
+# Один на процесс: запускается в dp.startup
+care_notifier = CareNotifier(config.CARE_NOTIFY_BATCH, config.CARE_MAX_SLEEP)
@@ -0,0 +1,41 @@
+"""
+Простой планировщик периодических задач в event loop бота
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Запускает корутины с заданным интервалом (в секундах)"""
+
+    def __init__(self):
+        self._jobs = []
+        self._tasks = []
+
+    def add_job(self, func, interval: float, name: str = None):
+        """Добавить задачу: func - функция без аргументов, возвращающая корутину"""
+        self._jobs.append((func, interval, name or func.__name__))
+
+    async def start(self):
+        """Запустить все задачи (подходит для dp.startup)"""
+        for func, interval, name in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run(func, interval, name), name=name))
+
+    async def stop(self):
+        """Остановить все задачи (подходит для dp.shutdown)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, func, interval: float, name: str):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Задача %s завершилась с ошибкой', name)
@@ -0,0 +1,192 @@
+"""
+Очередь исходящих запросов к Telegram
+
+Telegram пускает около 30 сообщений в секунду на бота и около одного в
+секунду в один чат. SendScheduler - request-middleware сессии бота: каждый
+запрос с chat_id ждёт разрешения от общей корзины токенов, а ждущие
+разбиты на полосы по приоритету. Ответы на нажатия (interactive) всегда
+проходят раньше уведомлений и рассылок, поэтому даже во время большой
+рассылки меню отвечает сразу.
+
+Полоса выбирается контекстом вызова:
+
+    with send_lane(NOTIFICATION):
+        await bot.send_message(chat_id, text)
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from config_reader import config
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Полосы по убыванию приоритета
+INTERACTIVE = 0
+NOTIFICATION = 1
+BROADCAST = 2
+LANE_NAMES = ('interactive', 'notification', 'broadcast')
+
+current_lane = ContextVar('send_lane', default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def send_lane(lane: int):
+    """Отправлять запросы внутри блока через полосу lane"""
+    token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class _LaneStats:
+    __slots__ = ('waiting', 'sent', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.waiting = 0
+        self.sent = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'waiting': self.waiting,
+            'sent': self.sent,
+            'avg_wait_ms': round(self.wait_total / self.sent * 1000, 1) if self.sent else 0.0,
+            'max_wait_ms': round(self.wait_max * 1000, 1),
+        }
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Общий лимит rate запросов в секунду с приоритетами и темпом на чат
+
+    Темп на чат (chat_interval) соблюдают только уведомления и рассылки:
+    ответ на действие пользователя не должен ждать секунду после прошлого.
+    На 429 (RetryAfter) выдача разрешений приостанавливается на указанное
+    время, и запрос повторяется до max_retries раз.
+    """
+
+    def __init__(self, rate: float = 30.0, chat_interval: float = 1.0, max_retries: int = 3,
+                 timer=time.monotonic):
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.retries = 0
+        self._timer = timer
+        self._tokens = rate
+        self._updated = timer()
+        self._paused_until = 0.0
+        self._waiters = tuple(deque() for _ in LANE_NAMES)
+        self._stats = tuple(_LaneStats() for _ in LANE_NAMES)
+        self._chat_slots = TTLCache(maxsize=100000, ttl=chat_interval)
+        self._pump = None
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        lane = current_lane.get()
+        for attempt in range(self.max_retries + 1):
+            if lane != INTERACTIVE:
+                await self._pace_chat(chat_id)
+            await self._acquire(lane)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                self._paused_until = max(self._paused_until, self._timer() + error.retry_after)
+                logger.warning('Telegram просит подождать %s с (%s), повтор', error.retry_after, type(method).__name__)
+
+    # === ТЕМП НА ЧАТ ===
+
+    async def _pace_chat(self, chat_id):
+        """Занять ближайший свободный слот чата и дождаться его"""
+        now = self._timer()
+        # Слоты кладутся по времени - прошедшие убираем с начала, память не растёт с рассылкой
+        self._chat_slots.expire()
+        slot = max(now, self._chat_slots.get(chat_id, now))
+        self._chat_slots.set(chat_id, slot + self.chat_interval, ttl=slot + self.chat_interval - now)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    # === ОБЩИЙ ЛИМИТ ===
+
+    def _refill(self, now: float):
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _acquire(self, lane: int):
+        stats = self._stats[lane]
+        started = self._timer()
+        self._refill(started)
+
+        # Быстрый путь: токен есть и никто не ждёт
+        if self._tokens >= 1 and started >= self._paused_until and not any(self._waiters):
+            self._tokens -= 1
+            stats.sent += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        stats.waiting += 1
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump(), name='send_scheduler')
+        try:
+            await future
+        finally:
+            stats.waiting -= 1
+
+        waited = self._timer() - started
+        stats.sent += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+
+    def _next_waiter(self):
+        for waiters in self._waiters:
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    return future
+        return None
+
+    async def _run_pump(self):
+        """Раздаёт токены ждущим, пока они есть: сначала старшим полосам"""
+        while any(self._waiters):
+            now = self._timer()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill(now)
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            future = self._next_waiter()
+            if future is not None:
+                self._tokens -= 1
+                future.set_result(None)
+
+    # === МЕТРИКИ ===
+
+    def stats(self) -> dict:
+        """Очередь и задержки по полосам"""
+        result = {name: stats.as_dict() for name, stats in zip(LANE_NAMES, self._stats)}
+        result['retries'] = self.retries
+        result['paused'] = self._timer() < self._paused_until
+        return result
+
+
+# Один планировщик на процесс: подключается к сессии бота в run.py
+sender = SendScheduler(config.SEND_RATE, config.SEND_CHAT_INTERVAL, config.SEND_MAX_RETRIES)
@@ -0,0 +1,48 @@
+"""
+Периодическая запись снижения статов в БД
+
+Статы и так считаются при чтении (database/decay.py), обход лишь сохраняет их,
+чтобы значения в таблице не отставали для SQL-запросов по статам.
+Работает пакетными UPDATE по диапазонам ID: каждый диапазон - отдельная
+короткая транзакция, поэтому SQLite не блокируется надолго.
+"""
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from database import crud
+from database.engine import get_db
+
+logger = logging.getLogger(__name__)
+
+SweepReport = namedtuple('SweepReport', ['rows', 'chunks', 'duration'])
+
+
+async def run_stats_sweep(chunk_size: int = 500) -> SweepReport:
+    """Один проход по таблице питомцев"""
+    started = time.perf_counter()
+    now = datetime.now()
+
+    async with get_db() as db:
+        first_id, last_id = await crud.get_pet_id_range(db)
+
+    rows = chunks = 0
+    if first_id is not None:
+        after_id = first_id - 1
+        while after_id < last_id:
+            async with get_db() as db:
+                rows += await crud.decay_pets_range(db, after_id, after_id + chunk_size, now)
+                await db.commit()
+            after_id += chunk_size
+            chunks += 1
+            # Отдаём управление апдейтам между транзакциями
+            await asyncio.sleep(0)
+
+    report = SweepReport(rows=rows, chunks=chunks, duration=time.perf_counter() - started)
+    logger.info(
+        '📉 Снижение статов: обновлено %d питомцев за %.3f с (%d пакетов)',
+        report.rows, report.duration, report.chunks
+    )
+    return report
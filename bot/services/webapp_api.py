@@ -0,0 +1,452 @@
+"""
+HTTP API для Mini App
+
+Mini App (docs/index.html) открывается внутри Telegram и получает initData -
+строку с данными пользователя, подписанную токеном бота. Клиент передаёт её в
+заголовке Authorization: tma <initData>, сервер проверяет HMAC (ключ -
+HMAC_SHA256("WebAppData", токен бота)) и срок auth_date. Проверенные строки
+кэшируются, поэтому опрос раз в несколько секунд не пересчитывает подпись.
+
+Ответы несут ETag: клиент присылает его в If-None-Match и, пока состояние не
+изменилось, получает 304 без тела. Питомец и игрок читаются через state_cache,
+так что повторный опрос обычно не доходит до БД; ETag магазина - версия
+справочника предметов.
+
+Действия (кормление, игра, отдых, покупка) клиент копит и присылает пачкой
+в POST /api/actions: вся пачка применяется в одной транзакции теми же
+функциями crud, что и кнопки бота, а в ответе - настоящее состояние.
+У каждого действия ключ идемпотентности: повтор запроса после обрыва связи
+не применит действие второй раз, а вернёт сохранённый результат.
+
+В режиме webhook API висит на том же сервере (префикс /api/), в режиме
+polling - на отдельном порту WEBAPP_API_PORT.
+"""
+import hashlib
+import json
+import logging
+import math
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from aiogram.utils.web_app import WebAppInitData, safe_parse_webapp_init_data
+from aiohttp import web
+from sqlalchemy.exc import IntegrityError
+
+from config_reader import config
+from database import crud, rules
+from database.catalog import get_catalog
+from database.engine import get_db, read_session
+from database.leveling import xp_to_next_level
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/'
+INVENTORY_PAGE_LIMIT = 100
+# Верхняя граница времени действия от клиента (2100-01-01, мс с эпохи)
+ACTION_AT_MAX = 4102444800000
+
+init_data_key = web.AppKey('init_data', WebAppInitData)
+
+USER_FIELDS = ('first_name', 'username', 'coins', 'crystals', 'login_streak', 'is_premium')
+PET_FIELDS = (
+    'id', 'name', 'species', 'personality', 'color', 'pattern',
+    'health', 'happiness', 'intelligence', 'energy',
+    'level', 'xp', 'evolution_stage', 'evolution_path',
+    'total_games_played', 'battles_won', 'battles_lost',
+)
+SHOP_FIELDS = (
+    'id', 'name', 'description', 'item_type', 'rarity',
+    'health_effect', 'happiness_effect', 'intelligence_effect', 'energy_effect',
+    'coin_price', 'crystal_price', 'icon_emoji', 'image_url',
+)
+
+
+class InitDataVerifier:
+    """Проверка initData с кэшем уже проверенных строк"""
+
+    def __init__(self, token: str, max_age: int = 86400, cache_size: int = 10000, cache_ttl: float = 300.0,
+                 timer=time.time):
+        self.token = token
+        self.max_age = max_age
+        self._verified = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._timer = timer
+
+    def verify(self, init_data: str):
+        """WebAppInitData, если подпись верна и не устарела, иначе None"""
+        data = self._verified.get(init_data)
+        if data is None:
+            try:
+                data = safe_parse_webapp_init_data(self.token, init_data)
+            except ValueError:
+                return None
+            if data.user is None:
+                return None
+            self._verified.set(init_data, data)
+
+        if self.max_age and self._timer() - data.auth_date.timestamp() > self.max_age:
+            return None
+        return data
+
+    def stats(self) -> dict:
+        return self._verified.stats()
+
+
+verifier = InitDataVerifier(
+    config.BOT_TOKEN.get_secret_value(), config.WEBAPP_AUTH_MAX_AGE, config.WEBAPP_AUTH_CACHE_SIZE
+)
+
+
+# === ОТВЕТЫ ===
+
+def _error(status: int, code: str) -> web.Response:
+    return web.json_response({'error': code}, status=status)
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode()
+
+
+def conditional_response(request: web.Request, body: bytes, etag: str = None, headers: dict = None):
+    """200 с телом и ETag или 304, если у клиента та же версия"""
+    etag = etag or hashlib.blake2b(body, digest_size=12).hexdigest()
+    response_headers = {'Cache-Control': 'no-cache', **(headers or {})}
+    if any(candidate.value in (etag, '*') for candidate in request.if_none_match or ()):
+        response = web.Response(status=304, headers=response_headers)
+    else:
+        response = web.Response(body=body, content_type='application/json', headers=response_headers)
+    response.etag = etag
+    return response
+
+
+def user_payload(user) -> dict:
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+
+def pet_payload(pet) -> dict:
+    """Питомец для клиента; статы - целыми, как на экранах бота"""
+    payload = {field: getattr(pet, field) for field in PET_FIELDS}
+    for stat in ('health', 'happiness', 'intelligence', 'energy'):
+        payload[stat] = int(payload[stat])
+    payload['xp_needed'] = xp_to_next_level(pet.level)
+    return payload
+
+
+# === MIDDLEWARE ===
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    """CORS для страницы Mini App (она на другом домене)"""
+    origin = request.headers.get('Origin')
+    allowed = origin if origin and origin in config.WEBAPP_CORS_ORIGINS else None
+
+    if request.method == 'OPTIONS':
+        response = web.Response(status=204)
+        if allowed:
+            response.headers.update({
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Authorization, Content-Type, If-None-Match',
+                # Префлайт кэшируется браузером - опрос не удваивает число запросов
+                'Access-Control-Max-Age': '86400',
+            })
+    else:
+        response = await handler(request)
+
+    if allowed:
+        response.headers['Access-Control-Allow-Origin'] = allowed
+        response.headers['Access-Control-Expose-Headers'] = 'ETag, X-Catalog-Version'
+        response.headers['Vary'] = 'Origin'
+    return response
+
+
+@web.middleware
+async def auth_middleware(request: web.Request, handler):
+    """Пускает только запросы с верной подписью initData"""
+    scheme, _, init_data = request.headers.get('Authorization', '').partition(' ')
+    data = verifier.verify(init_data) if scheme.lower() == 'tma' and init_data else None
+    if data is None:
+        return _error(401, 'unauthorized')
+    request[init_data_key] = data
+    return await handler(request)
+
+
+# === ОБРАБОТЧИКИ ===
+
+async def get_pet(request: web.Request) -> web.Response:
+    """Игрок и его питомец"""
+    telegram_id = request[init_data_key].user.id
+    async with read_session() as db:
+        state = await crud.get_player(db, telegram_id, create=False)
+    if state.user is None:
+        return _error(404, 'no_user')
+
+    body = _dumps({
+        'user': user_payload(state.user),
+        'pet': pet_payload(state.pet) if state.pet else None,
+    })
+    return conditional_response(request, body)
+
+
+async def get_inventory(request: web.Request) -> web.Response:
+    """Инвентарь постранично: ?type=food&after=<item_id>&limit=50 (limit до INVENTORY_PAGE_LIMIT)"""
+    try:
+        after_id = int(request.query['after']) if 'after' in request.query else None
+        limit = int(request.query.get('limit', INVENTORY_PAGE_LIMIT))
+    except ValueError:
+        return _error(400, 'bad_query')
+    # limit=0 или отрицательный в SQL означал бы "без ограничения"
+    if limit < 1:
+        return _error(400, 'bad_query')
+    limit = min(INVENTORY_PAGE_LIMIT, limit)
+
+    telegram_id = request[init_data_key].user.id
+    async with read_session() as db:
+        state = await crud.get_player(db, telegram_id, create=False)
+        if state.user is None:
+            return _error(404, 'no_user')
+        rows = await crud.get_inventory_rows(db, state.user.id, request.query.get('type'), after_id, limit)
+
+    body = _dumps({
+        'items': [row._asdict() for row in rows],
+        'next_after': rows[-1].item_id if len(rows) == limit else None,
+    })
+    return conditional_response(request, body)
+
+
+_shop_bodies = {}
+
+
+def _shop_body(catalog) -> bytes:
+    """Тело ответа магазина - одно на версию справочника"""
+    body = _shop_bodies.get(catalog.version)
+    if body is None:
+        items = [
+            {field: getattr(item, field) for field in SHOP_FIELDS}
+            for item in catalog.items if item.coin_price or item.crystal_price
+        ]
+        body = _dumps({'version': catalog.version, 'items': items})
+        _shop_bodies.clear()
+        _shop_bodies[catalog.version] = body
+    return body
+
+
+async def get_shop(request: web.Request) -> web.Response:
+    """Предметы, которые можно купить (без БД - из справочника в памяти)"""
+    catalog = get_catalog()
+    return conditional_response(
+        request, _shop_body(catalog), etag=catalog.version, headers={'X-Catalog-Version': catalog.version}
+    )
+
+
+# === ДЕЙСТВИЯ ===
+
+ClientAction = namedtuple('ClientAction', ['key', 'type', 'item_id', 'at'])
+
+
+def parse_actions(payload) -> list:
+    """Список ClientAction из тела запроса; ValueError, если формат неверный
+
+    Тело: {"actions": [{"id": "<ключ>", "type": "feed", "item_id": 1, "at": <мс с эпохи>}, ...]}
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('actions'), list):
+        raise ValueError('actions')
+    items = payload['actions']
+    if not 0 < len(items) <= config.WEBAPP_MAX_BATCH:
+        raise ValueError('batch_size')
+
+    actions = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('action')
+        key, action_type, item_id, at = item.get('id'), item.get('type'), item.get('item_id'), item.get('at')
+        if not isinstance(key, str) or not 0 < len(key) <= 64:
+            raise ValueError('id')
+        if action_type not in ACTIONS:
+            raise ValueError('type')
+        if item_id is not None and (isinstance(item_id, bool) or not isinstance(item_id, int)):
+            raise ValueError('item_id')
+        # bool - подкласс int, а NaN, inf и огромные числа не переводятся в datetime
+        if isinstance(at, bool) or not isinstance(at, (int, float)) or not (
+                math.isfinite(at) and 0 <= at <= ACTION_AT_MAX):
+            raise ValueError('at')
+        actions.append(ClientAction(key, action_type, item_id, at / 1000))
+    return actions
+
+
+def _rejected(reason: str, message: str = None) -> dict:
+    result = {'status': 'rejected', 'reason': reason}
+    if message:
+        result['message'] = message
+    return result
+
+
+async def _pay(db, user, item, reason: str) -> bool:
+    """Списать цену предмета (кристаллы, если она в кристаллах); False - не хватает"""
+    if item.crystal_price:
+        balance = await crud.update_user_currency(db, user.id, crystals=-item.crystal_price, reason=reason)
+    elif item.coin_price:
+        balance = await crud.update_user_currency(db, user.id, coins=-item.coin_price, reason=reason)
+    else:
+        return True
+    return balance is not None
+
+
+async def _feed(db, user, pet, action: ClientAction) -> dict:
+    """Покормить едой из инвентаря, а если её нет - купить"""
+    food = get_catalog().get(action.item_id)
+    if food is None or food.item_type != 'food':
+        return _rejected('unknown_item')
+    used = await crud.use_item(db, user.id, food.id)
+    if not used['success'] and not await _pay(db, user, food, 'webapp_feed'):
+        return _rejected('not_enough_funds')
+
+    await crud.feed_pet(db, pet.id, food)
+    xp = await crud.add_pet_xp(db, pet.id, rules.FEED_XP)
+    return {'status': 'applied', 'xp_gained': rules.FEED_XP, 'leveled_up': xp['leveled_up']}
+
+
+async def _play(db, user, pet, action: ClientAction) -> dict:
+    result = await crud.play_with_pet(db, pet.id)
+    if not result['success']:
+        return _rejected('tired', result['message'])
+    return {'status': 'applied', 'xp_gained': result['xp_gained'], 'leveled_up': result['leveled_up']}
+
+
+async def _rest(db, user, pet, action: ClientAction) -> dict:
+    await crud.rest_pet(db, pet.id)
+    return {'status': 'applied'}
+
+
+async def _buy(db, user, pet, action: ClientAction) -> dict:
+    item = get_catalog().get(action.item_id)
+    if item is None:
+        return _rejected('unknown_item')
+    if not (item.coin_price or item.crystal_price):
+        return _rejected('not_for_sale')
+    if not await _pay(db, user, item, 'webapp_buy'):
+        return _rejected('not_enough_funds')
+    await crud.add_item_to_user(db, user.id, item.id)
+    return {'status': 'applied'}
+
+
+ACTIONS = {'feed': _feed, 'play': _play, 'rest': _rest, 'buy': _buy}
+
+
+def _check_time(action: ClientAction, now: float):
+    """Отклонить действие из будущего или слишком старое (например, из офлайн-очереди)"""
+    if action.at > now + config.WEBAPP_ACTION_MAX_SKEW:
+        return _rejected('clock_skew')
+    if action.at < now - config.WEBAPP_ACTION_MAX_AGE:
+        return _rejected('expired')
+    return None
+
+
+async def _apply_batch(db, telegram_id: int, actions: list, now: float):
+    """Применить ещё не применённые действия пачки и закоммитить
+
+    Возвращает (user, pet, results, done): results - новые результаты,
+    done - сохранённые раньше; None, если у игрока нет питомца.
+    """
+    user = await crud.get_user(db, telegram_id)
+    pets = await crud.get_user_pets(db, user.id) if user else []
+    if not pets:
+        return None
+    pet = pets[0]
+
+    done = await crud.get_action_results(db, user.id, {action.key for action in actions})
+    results, applied = {}, []
+    # Порядок - как на клиенте (по времени нажатия), а не как пришло в пачке
+    for action in sorted(actions, key=lambda action: action.at):
+        if action.key in done or action.key in results:
+            continue
+        rejected = _check_time(action, now)
+        result = rejected or await ACTIONS[action.type](db, user, pet, action)
+        results[action.key] = result
+        applied.append({
+            'key': action.key, 'action': action.type, 'result': result,
+            'client_at': None if rejected else datetime.fromtimestamp(action.at),
+        })
+
+    if applied:
+        await crud.save_action_results(db, user.id, applied)
+    await db.commit()
+    return user, pet, results, done
+
+
+async def post_actions(request: web.Request) -> web.Response:
+    """Применить пачку действий в одной транзакции и вернуть состояние"""
+    try:
+        payload = await request.json()
+    except ValueError:
+        return _error(400, 'bad_json')
+    try:
+        actions = parse_actions(payload)
+    except ValueError as error:
+        return _error(400, f'bad_{error}')
+
+    telegram_id = request[init_data_key].user.id
+    now = time.time()
+    async with get_db() as db:
+        try:
+            batch = await _apply_batch(db, telegram_id, actions, now)
+        except IntegrityError:
+            # Ключ уже записал параллельный повтор этой же пачки (при нескольких
+            # пишущих соединениях): его действия применены, наши откатываем и
+            # проходим пачку заново - эти ключи вернутся как повторы
+            await db.rollback()
+            batch = await _apply_batch(db, telegram_id, actions, now)
+        if batch is None:
+            return _error(404, 'no_pet')
+        user, pet, results, done = batch
+
+        body = {
+            'results': [
+                {'id': action.key, **results[action.key]} if action.key in results
+                else {'id': action.key, **done[action.key], 'replayed': True}
+                for action in actions
+            ],
+            'user': user_payload(user),
+            'pet': pet_payload(pet),
+        }
+    return web.Response(body=_dumps(body), content_type='application/json', headers={'Cache-Control': 'no-store'})
+
+
+async def cleanup_action_keys():
+    """Удалить ключи действий старше WEBAPP_ACTION_KEY_TTL (задача планировщика)"""
+    async with get_db() as db:
+        removed = await crud.delete_old_action_results(
+            db, datetime.now() - timedelta(seconds=config.WEBAPP_ACTION_KEY_TTL)
+        )
+        await db.commit()
+    if removed:
+        logger.info('🧹 Удалено ключей действий Mini App: %d', removed)
+    return removed
+
+
+# === ПРИЛОЖЕНИЕ ===
+
+def build_api() -> web.Application:
+    """Приложение API (подключается как sub-app с префиксом /api/)"""
+    api = web.Application(middlewares=[cors_middleware, auth_middleware])
+    api.router.add_get('/pet', get_pet)
+    api.router.add_get('/inventory', get_inventory)
+    api.router.add_get('/shop', get_shop)
+    api.router.add_post('/actions', post_actions)
+    return api
+
+
+def setup_api(app: web.Application):
+    """Подключить API к существующему aiohttp-приложению"""
+    app.add_subapp(API_PREFIX, build_api())
+
+
+async def start_api_server() -> web.AppRunner:
+    """Отдельный сервер API (для режима polling); остановка - runner.cleanup()"""
+    app = web.Application()
+    setup_api(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, config.WEBAPP_API_HOST, config.WEBAPP_API_PORT).start()
+    logger.info('📱 API Mini App: %s:%s%s', config.WEBAPP_API_HOST, config.WEBAPP_API_PORT, API_PREFIX)
+    return runner
@@ -0,0 +1,135 @@
+"""
+Приём апдейтов через вебхук (RUN_MODE=webhook)
+
+aiohttp-сервер на SimpleRequestHandler из aiogram: проверка секретного токена,
+ограничение числа одновременно обрабатываемых апдейтов и /healthz для
+балансировщика. Апдейт обрабатывается прямо в запросе, поэтому пока все
+слоты заняты, Telegram ждёт ответа и не присылает новые (не больше
+WEBHOOK_MAX_CONCURRENCY соединений, см. set_webhook).
+"""
+import asyncio
+import logging
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config_reader import config
+from middlewares.ordering import user_ordering
+from middlewares.throttling import throttling
+from services.sender import sender
+from services.webapp_api import setup_api, verifier
+from utils.messages import edit_cache
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = '/healthz'
+
+limiter_key = web.AppKey('limiter', object)
+started_key = web.AppKey('started_at', float)
+
+
+class ConcurrencyLimiter:
+    """Не больше limit апдейтов в обработке одновременно; остальные ждут слота"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.handled = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        if request.path != config.WEBHOOK_PATH:
+            return await handler(request)
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+            self.handled += 1
+            self._semaphore.release()
+
+
+async def health(request: web.Request) -> web.Response:
+    """Жив ли сервер и насколько он загружен"""
+    limiter = request.app[limiter_key]
+    return web.json_response({
+        'status': 'ok',
+        'in_flight': limiter.in_flight,
+        'waiting': limiter.waiting,
+        'handled': limiter.handled,
+        'limit': limiter.limit,
+        'uptime': int(time.monotonic() - request.app[started_key]),
+        'user_queues': user_ordering.stats(),
+        'throttling': throttling.stats(),
+        'edits': edit_cache.stats(),
+        'sender': sender.stats(),
+        'webapp_auth': verifier.stats(),
+    })
+
+
+def build_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    """aiohttp-приложение с вебхуком, лимитом и /healthz"""
+    limiter = ConcurrencyLimiter(config.WEBHOOK_MAX_CONCURRENCY)
+    secret = config.WEBHOOK_SECRET.get_secret_value()
+
+    app = web.Application(middlewares=[limiter.middleware])
+    app[limiter_key] = limiter
+    app[started_key] = time.monotonic()
+    app.router.add_get(HEALTH_PATH, health)
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=False,
+        secret_token=secret,
+    ).register(app, path=config.WEBHOOK_PATH)
+
+    if config.WEBAPP_API:
+        setup_api(app)
+
+    # dp.startup / dp.shutdown (планировщик, сброс активности) - вместе с сервером
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def set_webhook(bot: Bot, dp: Dispatcher):
+    """Сообщить Telegram адрес вебхука"""
+    secret = config.WEBHOOK_SECRET.get_secret_value()
+    await bot.set_webhook(
+        url=config.WEBHOOK_URL.rstrip('/') + config.WEBHOOK_PATH,
+        secret_token=secret,
+        max_connections=config.WEBHOOK_MAX_CONCURRENCY,
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=config.DROP_PENDING_UPDATES,
+    )
+    logger.info('🌐 Вебхук: %s%s', config.WEBHOOK_URL.rstrip('/'), config.WEBHOOK_PATH)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Поднять сервер и работать до отмены (Ctrl+C)"""
+    if config.WEBHOOK_URL:
+        await set_webhook(bot, dp)
+    else:
+        logger.warning('WEBHOOK_URL не задан - вебхук в Telegram не регистрируется')
+
+    runner = web.AppRunner(build_app(dp, bot))
+    await runner.setup()
+    site = web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    await site.start()
+    logger.info('🌐 Слушаю %s:%s', config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,277 @@
+"""
+Тексты экранов бота
+
+Статичные экраны подготовлены один раз при импорте: отступы убраны.
+Экраны со значениями собираются f-строками, а частые из них кэшируются
+по нужным полям снимка пользователя/питомца (UserSnapshot, PetSnapshot или
+объекты моделей): пока значения на экране не изменились, повторный рендер -
+поиск в lru_cache без сборки строки, а промах стоит как обычная f-строка.
+"""
+import textwrap
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+
+from database.leveling import xp_to_next_level
+
+RENDER_CACHE_SIZE = 4096
+
+
+def _static(text: str) -> str:
+    """Экран без отступов и хвостовых пробелов"""
+    lines = textwrap.dedent(text).strip('\n').splitlines()
+    return '\n'.join(line.rstrip() for line in lines)
+
+
+# === СТАТИЧНЫЕ ЭКРАНЫ ===
+
+CREATE_PET = _static("""
+    🎨 <b>Создание питомца - Шаг 1/3</b>
+
+    <b>Выбери вид своего питомца:</b>
+
+    🐱 <b>Киберкот</b> - ловкий и быстрый
+    🐉 <b>Дракончик</b> - сильный и храбрый
+    ☁️ <b>Облачко</b> - милое и доброе
+    🤖 <b>Робопёс</b> - умный и верный
+""")
+
+HELP = _static("""
+    <b>📖 Справка по Pawer</b>
+
+    <b>Основные команды:</b>
+    /start - Начать или показать меню
+    /stats - Посмотреть статистику
+    /help - Эта справка
+
+    <b>🎮 Как играть:</b>
+
+    1️⃣ <b>Заботься о питомце</b>
+       • Корми его регулярно 🍕
+       • Играй с ним 🎮
+       • Давай отдыхать 😴
+
+    2️⃣ <b>Качай уровень</b>
+       • Выполняй действия → получай XP
+       • Повышай уровень → открывай эволюции
+
+    3️⃣ <b>Развивай питомца</b>
+       • Учи новым навыкам
+       • Экипируй предметы
+       • Кастомизируй внешний вид
+
+    4️⃣ <b>Сражайся и побеждай</b>
+       • PvP бои с другими игроками
+       • Турниры с крутыми призами
+       • Босс-рейды вместе с друзьями
+
+    <b>💡 Советы:</b>
+    • Заходи каждый день для бонусов
+    • Не забывай кормить питомца
+    • Участвуй в ивентах для наград
+
+    <b>Открой Mini App для полного функционала! 👇</b>
+""")
+
+NO_PET_MENU = 'У тебя пока нет питомца! Создай его:'
+NO_PET_STATS = 'У тебя пока нет питомца! Используй /start чтобы создать.'
+
+
+# === ЭКРАНЫ СО ЗНАЧЕНИЯМИ ===
+# Закэшированные функции собирают текст из готовых значений (статы - уже
+# целыми, как на экране); ключ кэша - сами значения, то есть версия того,
+# что видит игрок. Публичные функции ниже достают их из снимков.
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_welcome(first_name):
+    return f"""\
+🌟 <b>Привет, {escape(first_name or '')}!</b>
+
+Добро пожаловать в <b>Pawer</b> - мир цифровых питомцев!
+
+Здесь ты сможешь:
+🐱 Вырастить своего уникального питомца
+💖 Заботиться о нём и играть вместе
+⚔️ Сражаться с другими игроками
+🎨 Кастомизировать внешний вид
+🏆 Достигать невероятных высот!
+
+<b>Давай создадим твоего первого питомца!</b>"""
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_welcome_back(first_name, name, level, health):
+    return f"""\
+Привет снова, {escape(first_name or '')}! 👋
+
+Твой питомец <b>{escape(name)}</b> ждёт тебя!
+Уровень: {level} | Здоровье: {health}❤️"""
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_main_menu(name, level, health, happiness, energy, coins, crystals):
+    return f"""\
+🏠 <b>Главное меню</b>
+
+<b>{escape(name)}</b> - Уровень {level}
+
+❤️ Здоровье: {health}
+😊 Настроение: {happiness}
+⚡ Энергия: {energy}
+
+💰 Твои ресурсы:
+🪙 {coins} монет
+💎 {crystals} кристаллов
+
+Открой приложение для полного управления! 👇"""
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_pet_stats(name, species, personality, level, xp, health, happiness, intelligence, energy,
+                      games, won, lost, stage, path, skills, days):
+    xp_needed = xp_to_next_level(level)
+    skills_text = ''
+    if skills:
+        skills_text = '\n\n<b>🎯 Навыки:</b>\n' + ''.join(
+            f'• {escape(skill)} (ур. {skill_level})\n' for skill, skill_level in skills
+        )
+    return f"""\
+📊 <b>Статистика питомца</b>
+
+<b>Имя:</b> {escape(name)}
+<b>Вид:</b> {species}
+<b>Характер:</b> {personality}
+
+<b>⭐ Уровень {level}</b>
+Опыт: {xp}/{xp_needed} ({min(100, int((xp / xp_needed) * 100))}%)
+
+<b>📈 Характеристики:</b>
+❤️ Здоровье: {health}/100
+😊 Настроение: {happiness}/100
+🧠 Интеллект: {intelligence}/100
+⚡ Энергия: {energy}/100
+
+<b>🏆 Достижения:</b>
+🎮 Игр сыграно: {games}
+⚔️ Побед в боях: {won}
+💀 Поражений: {lost}
+
+<b>🎭 Эволюция:</b>
+Стадия: {stage}/4
+Путь: {path}
+{skills_text}
+
+<i>Питомец с тобой уже {days} дней</i>"""
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_player_stats(first_name, streak, coins, crystals, name, level, health, happiness, energy):
+    return f"""\
+📊 <b>Статистика</b>
+
+<b>👤 Игрок:</b>
+Имя: {escape(first_name or '')}
+Стрик логинов: {streak} дней 🔥
+🪙 Монеты: {coins}
+💎 Кристаллы: {crystals}
+
+<b>🐾 Питомец: {escape(name)}</b>
+Уровень: {level}
+❤️ {health} | 😊 {happiness} | ⚡ {energy}
+
+Используй Mini App для полного управления! 👇"""
+
+
+_CARE_STAT_LINES = {
+    'health': '❤️ Здоровье: {}/100 - пора покормить'.format,
+    'happiness': '😊 Настроение: {}/100 - пора поиграть'.format,
+}
+
+
+def welcome(first_name: str) -> str:
+    """Приветствие нового игрока"""
+    return _render_welcome(first_name)
+
+
+def welcome_back(first_name: str, pet) -> str:
+    """Приветствие игрока, у которого уже есть питомец"""
+    return _render_welcome_back(first_name, pet.name, pet.level, int(pet.health))
+
+
+def species_chosen(species_name: str, emoji: str) -> str:
+    """Экран после выбора вида питомца"""
+    return f"""\
+✨ <b>Отличный выбор!</b>
+
+Твой {species_name} {emoji} готов к жизни!
+
+<b>Как назовём питомца?</b>
+Напиши имя в чат (например: Барсик, Дракоша, Пушок)"""
+
+
+def pet_created(pet) -> str:
+    """Поздравление с новым питомцем"""
+    return f"""\
+🎉 <b>Поздравляю!</b>
+
+Твой питомец <b>{escape(pet.name)}</b> родился! 🐱✨
+
+<b>Стартовые характеристики:</b>
+❤️ Здоровье: {int(pet.health)}
+😊 Настроение: {int(pet.happiness)}
+🧠 Интеллект: {int(pet.intelligence)}
+⚡ Энергия: {int(pet.energy)}
+
+<b>Ты получил:</b>
+🪙 100 монет
+💎 10 кристаллов
+🍞 3x Хлеб (стартовая еда)
+
+Открой Mini App чтобы начать заботиться о питомце! 👇"""
+
+
+def main_menu(user, pet) -> str:
+    """Главное меню: питомец и ресурсы игрока"""
+    return _render_main_menu(
+        pet.name, pet.level, int(pet.health), int(pet.happiness), int(pet.energy), user.coins, user.crystals
+    )
+
+
+def pet_stats(pet, skills=(), now: datetime = None) -> str:
+    """Подробная статистика питомца (показываются первые 5 навыков)"""
+    now = now or datetime.now()
+    return _render_pet_stats(
+        pet.name, pet.species, pet.personality, pet.level, pet.xp,
+        int(pet.health), int(pet.happiness), int(pet.intelligence), int(pet.energy),
+        pet.total_games_played, pet.battles_won, pet.battles_lost, pet.evolution_stage, pet.evolution_path,
+        tuple((skill.skill_name, skill.level) for skill in skills[:5]),
+        (now - pet.created_at).days,
+    )
+
+
+def player_stats(user, pet) -> str:
+    """Короткая статистика игрока и питомца (/stats)"""
+    return _render_player_stats(
+        user.first_name, user.login_streak, user.coins, user.crystals,
+        pet.name, pet.level, int(pet.health), int(pet.happiness), int(pet.energy),
+    )
+
+
+def care_reminder(pet, stats) -> str:
+    """Напоминание о питомце; stats - названия просевших статов"""
+    lines = '\n'.join(_CARE_STAT_LINES[stat](int(getattr(pet, stat))) for stat in stats)
+    return f"""\
+🥺 <b>{escape(pet.name)}</b> скучает по тебе!
+
+{lines}
+
+Загляни к питомцу, пока ему не стало совсем плохо 👇"""
+
+
+def cache_info() -> dict:
+    """Попадания в кэш рендера по экранам"""
+    return {
+        render.__name__.removeprefix('_render_'): render.cache_info()._asdict()
+        for render in (_render_welcome, _render_welcome_back, _render_main_menu, _render_pet_stats,
+                       _render_player_stats)
+    }
@@ -0,0 +1,95 @@
+"""
+Кэш в памяти процесса
+"""
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """LRU-кэш ограниченного размера с временем жизни записей
+
+    Считает попадания, промахи, вытеснения по размеру и устаревшие записи,
+    чтобы по ним можно было подобрать maxsize и ttl.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Значение по ключу или default, если его нет или оно устарело"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= self._timer():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        """Положить значение; при переполнении вытесняется самое старое"""
+        self._data[key] = (self._timer() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def expire(self) -> int:
+        """Удалить устаревшие записи с начала (самые старые); возвращает их число
+
+        Останавливается на первой живой записи, поэтому дешёвая, когда записи
+        кладутся с одинаковым ttl и без повторных чтений (очереди, слоты).
+        """
+        now = self._timer()
+        removed = 0
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def pop(self, key, default=None):
+        """Удалить значение (без учёта в счётчиках)"""
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def keys(self):
+        """Ключи от самых старых к самым свежим (включая устаревшие)"""
+        return self._data.keys()
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Счётчики кэша"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
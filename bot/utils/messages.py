@@ -0,0 +1,73 @@
+"""
+Редактирование сообщений без лишних запросов к Telegram
+
+Меню перерисовывается на каждое нажатие, но часто выходит тем же самым.
+Для каждого сообщения помним отпечаток последнего текста с клавиатурой и не
+отправляем edit_text, если он не изменился.
+"""
+import hashlib
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+
+from config_reader import config
+from utils.cache import TTLCache
+
+
+def fingerprint(text: str, reply_markup=None, parse_mode=None) -> bytes:
+    """Короткий отпечаток того, что увидит пользователь"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(text.encode())
+    digest.update(b'\0' + str(parse_mode).encode())
+    if reply_markup is not None:
+        digest.update(b'\0' + reply_markup.model_dump_json(exclude_none=True).encode())
+    return digest.digest()
+
+
+class EditCache:
+    """Отпечатки последних правок по (chat_id, message_id) и счётчики"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400.0):
+        self._fingerprints = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.sent = 0
+        self.saved = 0
+
+    async def edit_text(self, message: Message, text: str, reply_markup=None, **kwargs):
+        """message.edit_text, который пропускает правку без изменений
+
+        Возвращает результат edit_text или None, если правка не понадобилась.
+        """
+        key = (message.chat.id, message.message_id)
+        current = fingerprint(text, reply_markup, kwargs.get('parse_mode'))
+        if self._fingerprints.get(key) == current:
+            self.saved += 1
+            return None
+
+        try:
+            result = await message.edit_text(text, reply_markup=reply_markup, **kwargs)
+        except TelegramBadRequest as error:
+            # Сообщение уже такое (например, кэш потерял запись после перезапуска)
+            if 'message is not modified' not in str(error):
+                raise
+            self._fingerprints.set(key, current)
+            self.saved += 1
+            return None
+
+        self._fingerprints.set(key, current)
+        self.sent += 1
+        return result
+
+    def forget(self, message: Message):
+        """Сообщение изменили в обход кэша - следующую правку отправить обязательно"""
+        self._fingerprints.pop((message.chat.id, message.message_id))
+
+    def stats(self) -> dict:
+        return {'sent': self.sent, 'saved': self.saved, 'tracked': len(self._fingerprints)}
+
+
+edit_cache = EditCache(config.EDIT_CACHE_SIZE, config.EDIT_CACHE_TTL)
+
+
+async def safe_edit_text(message: Message, text: str, reply_markup=None, **kwargs):
+    """Изменить текст сообщения, если он действительно поменялся"""
+    return await edit_cache.edit_text(message, text, reply_markup=reply_markup, **kwargs)
@@ -0,0 +1,52 @@
+"""
+Бенчмарк клавиатур: сборка на каждый апдейт против общего экземпляра
+
+"было" - прежняя inline_main_menu (InlineKeyboardBuilder и новые модели
+pydantic на каждый вызов), "стало" - keyboards.inline с кэшем. Вторая
+колонка добавляет сериализацию, которую всё равно делает aiogram при отправке.
+
+    python scripts/bench_keyboards.py [--number 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+from aiogram.types import WebAppInfo  # noqa: E402
+from aiogram.utils.keyboard import InlineKeyboardBuilder  # noqa: E402
+
+from keyboards.inline import MINI_APP_URL, inline_main_menu  # noqa: E402
+
+
+def old_inline_main_menu():
+    kb = InlineKeyboardBuilder()
+    kb.button(text='🎮 Открыть приложение', web_app=WebAppInfo(url=MINI_APP_URL))
+    kb.button(text='🍞 Быстро покормить', callback_data='quick_feed')
+    kb.button(text='🎯 Быстро поиграть', callback_data='quick_play')
+    kb.button(text='📊 Статистика', callback_data='pet_stats')
+    kb.adjust(1, 2, 1)
+    return kb.as_markup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    assert old_inline_main_menu().model_dump_json() == inline_main_menu().model_dump_json()
+
+    def per_call(case):
+        return min(timeit.repeat(case, number=args.number, repeat=3)) / args.number * 1e6
+
+    print(f'{"":<8} {"сборка, мкс":>12} {"+ JSON, мкс":>12}')
+    for name, build in (('было', old_inline_main_menu), ('стало', inline_main_menu)):
+        built = per_call(build)
+        dumped = per_call(lambda: build().model_dump_json(exclude_none=True))
+        print(f'{name:<8} {built:>12.2f} {dumped:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Бенчмарк игровой логики: MemoryRepository против SqlRepository
+
+Прогоняет одинаковый сценарий (регистрация, питомец, стартовый набор, затем
+раунды: кормление, игра, отдых, инвентарь) на обоих хранилищах. В SQL каждый
+шаг - отдельная сессия и commit, как апдейт в DbSessionMiddleware. Разница
+между строками - цена хранилища.
+
+    python scripts/bench_repository.py [--players 200] [--rounds 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench.db')
+for key, value in {'BOT_TOKEN': '0:bench', 'LOG_LEVEL': 'WARNING', 'ADMIN_IDS': '0'}.items():
+    os.environ.setdefault(key, value)
+
+from database.catalog import get_catalog, reload_catalog  # noqa: E402
+from database.engine import close_db, get_db, init_db  # noqa: E402
+from database.init_data import add_starter_items  # noqa: E402
+from database.repository import MemoryRepository, SqlRepository  # noqa: E402
+
+
+def memory_steps(repo):
+    """Каждый шаг сценария получает один и тот же репозиторий"""
+    @contextlib.asynccontextmanager
+    async def step():
+        yield repo
+    return step
+
+
+def sql_steps():
+    """Каждый шаг сценария - своя сессия и commit"""
+    @contextlib.asynccontextmanager
+    async def step():
+        async with get_db() as db:
+            yield SqlRepository(db)
+            await db.commit()
+    return step
+
+
+async def player_session(step, telegram_id: int, rounds: int, food) -> int:
+    """Сценарий одного игрока; возвращает число выполненных шагов"""
+    async with step() as repo:
+        user = await repo.get_or_create_user(telegram_id, f'user{telegram_id}', 'Bench')
+        pet = await repo.create_pet(user.id, 'Бенч', 'cyber_cat', 'playful')
+        await repo.add_items_to_user(user.id, {food.id: rounds})
+    user_id, pet_id = user.id, pet.id
+    steps = 1
+
+    for _ in range(rounds):
+        async with step() as repo:
+            await repo.get_or_create_user(telegram_id)
+            if (await repo.use_item(user_id, food.id))['success']:
+                await repo.feed_pet(pet_id, food)
+        async with step() as repo:
+            await repo.play_with_pet(pet_id)
+            await repo.update_user_currency(user_id, coins=5, reason='bench')
+        async with step() as repo:
+            await repo.rest_pet(pet_id)
+        async with step() as repo:
+            await repo.get_user_pets(user_id)
+            await repo.get_inventory_rows(user_id, limit=20)
+        steps += 4
+    return steps
+
+
+async def run(name: str, step, players: int, rounds: int, first_id: int, food):
+    started = time.perf_counter()
+    steps = 0
+    for telegram_id in range(first_id, first_id + players):
+        steps += await player_session(step, telegram_id, rounds, food)
+    duration = time.perf_counter() - started
+    print(f'{name:<8} {steps:>7} шагов за {duration:6.2f} с  ->  {steps / duration:>9.0f} шагов/с')
+    return duration
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    await init_db()
+    with contextlib.redirect_stdout(None):
+        await add_starter_items()
+    await reload_catalog()
+    food = get_catalog().find('Хлеб')
+
+    memory = await run('memory', memory_steps(MemoryRepository()), args.players, args.rounds, 1, food)
+    sql = await run('sql', sql_steps(), args.players, args.rounds, 1, food)
+    print(f'накладные расходы SQLite: x{sql / memory:.1f}')
+    await close_db()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
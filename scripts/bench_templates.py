@@ -0,0 +1,119 @@
+"""
+Микробенчмарк рендера экранов
+
+Сравнивает прежние f-строки из user_handlers.py с templates/screens.py:
+попадание в кэш (те же значения, как при повторном открытии меню) и промах
+(каждый рендер - новые значения: поиск в кэше, сборка строки и запись).
+
+    python scripts/bench_templates.py [--number 200000]
+"""
+import argparse
+import itertools
+import os
+import sys
+import timeit
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+from templates import screens  # noqa: E402
+
+User = namedtuple('User', 'first_name login_streak coins crystals')
+Pet = namedtuple('Pet', 'name species personality level xp health happiness intelligence energy '
+                        'total_games_played battles_won battles_lost evolution_stage evolution_path created_at')
+Skill = namedtuple('Skill', 'skill_name level')
+
+USER = User('Игрок', 5, 1250, 30)
+PET = Pet('Барсик', 'cyber_cat', 'playful', 12, 420, 87.0, 64.0, 55.0, 71.0, 130, 14, 3, 1, 'neutral',
+          datetime.now() - timedelta(days=40))
+SKILLS = [Skill('Прыжок', 2), Skill('Мурчание', 1)]
+
+
+def old_main_menu(user, pet):
+    return f"""
+🏠 <b>Главное меню</b>
+
+<b>{pet.name}</b> - Уровень {pet.level}
+
+❤️ Здоровье: {int(pet.health)}
+😊 Настроение: {int(pet.happiness)}
+⚡ Энергия: {int(pet.energy)}
+
+💰 Твои ресурсы:
+🪙 {user.coins} монет
+💎 {user.crystals} кристаллов
+
+Открой приложение для полного управления! 👇
+        """
+
+
+def old_pet_stats(pet, skills):
+    xp_needed = pet.level * 100
+    xp_progress = min(100, int((pet.xp / xp_needed) * 100))
+    skills_text = ""
+    if skills:
+        skills_text = "\n\n<b>🎯 Навыки:</b>\n"
+        for skill in skills[:5]:
+            skills_text += f"• {skill.skill_name} (ур. {skill.level})\n"
+    return f"""
+📊 <b>Статистика питомца</b>
+
+<b>Имя:</b> {pet.name}
+<b>Вид:</b> {pet.species}
+<b>Характер:</b> {pet.personality}
+
+<b>⭐ Уровень {pet.level}</b>
+Опыт: {pet.xp}/{xp_needed} ({xp_progress}%)
+
+<b>📈 Характеристики:</b>
+❤️ Здоровье: {int(pet.health)}/100
+😊 Настроение: {int(pet.happiness)}/100
+🧠 Интеллект: {int(pet.intelligence)}/100
+⚡ Энергия: {int(pet.energy)}/100
+
+<b>🏆 Достижения:</b>
+🎮 Игр сыграно: {pet.total_games_played}
+⚔️ Побед в боях: {pet.battles_won}
+💀 Поражений: {pet.battles_lost}
+
+<b>🎭 Эволюция:</b>
+Стадия: {pet.evolution_stage}/4
+Путь: {pet.evolution_path}
+{skills_text}
+
+<i>Питомец с тобой уже {(datetime.now() - pet.created_at).days} дней</i>
+        """
+
+
+def misses(render, field, start):
+    """Рендер, у которого на каждом вызове новое значение field - всегда промах кэша"""
+    values = itertools.count(start)
+    return lambda obj, *args: render(obj._replace(**{field: next(values)}), *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200000)
+    args = parser.parse_args()
+
+    def measure(name, render, *objects):
+        seconds = min(timeit.repeat(lambda: render(*objects), number=args.number, repeat=3))
+        print(f'{name:<28} {args.number / seconds:>12,.0f} рендеров/с')
+
+    measure('main_menu: f-строка', old_main_menu, USER, PET)
+    measure('pet_stats: f-строка', old_pet_stats, PET, SKILLS)
+    measure('main_menu: попадание в кэш', screens.main_menu, USER, PET)
+    measure('pet_stats: попадание в кэш', screens.pet_stats, PET, SKILLS)
+
+    # Промах: на каждом вызове новые монеты/опыт, как после каждого действия
+    # игрока. f-строкам даются те же значения, чтобы сравнение было честным
+    measure('main_menu: f-строка, новые', misses(old_main_menu, 'coins', 10 ** 9), USER, PET)
+    measure('pet_stats: f-строка, новые', misses(old_pet_stats, 'xp', 10 ** 9), PET, SKILLS)
+    measure('main_menu: промах кэша', misses(screens.main_menu, 'coins', 10 ** 9), USER, PET)
+    measure('pet_stats: промах кэша', misses(screens.pet_stats, 'xp', 10 ** 9), PET, SKILLS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Проверка, что горячие запросы используют индексы
+
+Применяет миграции к временной БД и смотрит EXPLAIN QUERY PLAN.
+Код выхода 1, если какой-то запрос обходит таблицу целиком.
+
+    python scripts/check_query_plans.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'plans.db')
+for key, value in {'BOT_TOKEN': '0:check', 'LOG_LEVEL': 'WARNING', 'ADMIN_IDS': '0'}.items():
+    os.environ.setdefault(key, value)
+
+from database.diagnostics import check_hot_queries  # noqa: E402
+from database.engine import close_db, get_db, init_db  # noqa: E402
+
+
+async def main():
+    await init_db()
+    async with get_db() as db:
+        report = await check_hot_queries(db)
+    await close_db()
+
+    failed = False
+    for name, scans in report.items():
+        if scans:
+            failed = True
+            print(f'❌ {name}: {"; ".join(scans)}')
+        else:
+            print(f'✅ {name}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,192 @@
+"""
+Нагрузочный тест API Mini App
+
+Каждый виртуальный клиент - игрок с подписанной initData: опрашивает
+/api/pet, /api/inventory и /api/shop, запоминает ETag и шлёт его в
+If-None-Match, как это делает Mini App. Печатает запросы в секунду,
+задержки и долю ответов 304. С --burst N каждый клиент в конце отправляет
+N нажатий одной пачкой в /api/actions и повторяет тот же запрос - повтор
+должен вернуть сохранённые результаты, ничего не применив заново.
+
+    python scripts/load_api.py --local --users 200 --seconds 10
+    python scripts/load_api.py --local --users 50 --seconds 3 --burst 20
+    python scripts/load_api.py --url http://127.0.0.1:8081 --users 50
+
+--local поднимает API в этом же процессе на временной БД с --users игроками.
+Без него нужен запущенный бот с WEBAPP_API=true, тем же BOT_TOKEN и игроками
+с telegram_id 1..--users.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from urllib.parse import urlencode
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ('/api/pet', '/api/inventory', '/api/shop')
+
+
+def sign_init_data(token: str, user_id: int) -> str:
+    """initData, как её подписывает Telegram"""
+    fields = {
+        'auth_date': str(int(time.time())),
+        'query_id': f'load{user_id}',
+        'user': json.dumps({'id': user_id, 'first_name': f'Load{user_id}'}, separators=(',', ':')),
+    }
+    check_string = '\n'.join(f'{key}={value}' for key, value in sorted(fields.items()))
+    secret = hmac.new(b'WebAppData', token.encode(), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+async def client(session, base_url: str, init_data: str, deadline: float, interval: float, results: dict):
+    headers = {'Authorization': f'tma {init_data}'}
+    etags = {}
+    while time.perf_counter() < deadline:
+        for path in ENDPOINTS:
+            request_headers = dict(headers)
+            if path in etags:
+                request_headers['If-None-Match'] = etags[path]
+            started = time.perf_counter()
+            async with session.get(base_url + path, headers=request_headers) as response:
+                await response.read()
+                if response.headers.get('ETag'):
+                    etags[path] = response.headers['ETag']
+            results['latencies'].append(time.perf_counter() - started)
+            results['statuses'][response.status] = results['statuses'].get(response.status, 0) + 1
+        await asyncio.sleep(interval)
+
+
+async def burst(session, base_url: str, init_data: str, taps: int, results: dict):
+    """taps нажатий одним запросом, затем повтор того же запроса"""
+    now = int(time.time() * 1000)
+    kinds = ('play', 'rest', 'play', 'rest')
+    actions = [
+        {'id': uuid.uuid4().hex, 'type': kinds[index % len(kinds)], 'at': now + index}
+        for index in range(taps)
+    ]
+    headers = {'Authorization': f'tma {init_data}'}
+    answers = []
+    for _ in range(2):
+        started = time.perf_counter()
+        async with session.post(base_url + '/api/actions', json={'actions': actions}, headers=headers) as response:
+            answers.append(await response.json() if response.status == 200 else None)
+        results['burst_latencies'].append(time.perf_counter() - started)
+    first, retry = answers
+    safe = (
+        first is not None and retry is not None and first['pet'] == retry['pet']
+        and all(result.get('replayed') for result in retry['results'])
+    )
+    results['burst_safe'] += safe
+
+
+async def load(base_url: str, token: str, users: int, seconds: float, interval: float, taps: int = 0):
+    results = {'latencies': [], 'statuses': {}, 'burst_latencies': [], 'burst_safe': 0}
+    deadline = time.perf_counter() + seconds
+    connector = aiohttp.TCPConnector(limit=users)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client(session, base_url, sign_init_data(token, user_id), deadline, interval, results)
+            for user_id in range(1, users + 1)
+        ))
+        duration = time.perf_counter() - started
+
+        if taps:
+            await asyncio.gather(*(
+                burst(session, base_url, sign_init_data(token, user_id), taps, results)
+                for user_id in range(1, users + 1)
+            ))
+
+        # Неверная подпись должна отклоняться
+        bad = sign_init_data(token + 'x', 1)
+        async with session.get(base_url + '/api/pet', headers={'Authorization': f'tma {bad}'}) as response:
+            rejected = response.status == 401
+
+    latencies = sorted(results['latencies'])
+    statuses = results['statuses']
+    print(f'{len(latencies)} запросов за {duration:.1f} с ({len(latencies) / duration:.0f}/с), '
+          f'{users} клиентов')
+    print(f'Коды ответов: {dict(sorted(statuses.items()))}, '
+          f'304: {statuses.get(304, 0) * 100 // max(1, len(latencies))}%')
+    print(f'Задержка: p50 {statistics.median(latencies) * 1000:.1f} мс, '
+          f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс, '
+          f'max {latencies[-1] * 1000:.1f} мс')
+    print(f'Чужая подпись отклонена: {"да" if rejected else "НЕТ"}')
+    ok = rejected and set(statuses) <= {200, 304}
+    if taps:
+        burst_latencies = sorted(results['burst_latencies'])
+        print(f'Пачки по {taps} нажатий: p50 {statistics.median(burst_latencies) * 1000:.1f} мс '
+              f'на запрос, повтор безопасен у {results["burst_safe"]}/{users} клиентов')
+        ok = ok and results['burst_safe'] == users
+    return 0 if ok else 1
+
+
+async def run_local(args):
+    """Поднять API на временной БД с args.users игроками и прогнать нагрузку"""
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'load_api.db')
+    for key, value in {'BOT_TOKEN': '0:load', 'LOG_LEVEL': 'WARNING', 'ADMIN_IDS': '0'}.items():
+        os.environ.setdefault(key, value)
+    sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+    from aiohttp import web
+
+    from config_reader import config
+    from database import crud
+    from database.catalog import reload_catalog
+    from database.engine import close_db, get_db, init_db
+    from database.init_data import add_starter_items
+    from services.webapp_api import setup_api
+
+    await init_db()
+    await add_starter_items()
+    await reload_catalog()
+    async with get_db() as db:
+        for user_id in range(1, args.users + 1):
+            user = await crud.get_or_create_user(db, user_id, first_name=f'Load{user_id}')
+            await crud.create_pet(db, user.id, f'Pet{user_id}', 'cyber_cat', 'playful')
+            await crud.give_starter_items(db, user.id)
+        await db.commit()
+
+    app = web.Application()
+    setup_api(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        return await load(f'http://127.0.0.1:{port}', config.BOT_TOKEN.get_secret_value(),
+                          args.users, args.seconds, args.interval, args.burst)
+    finally:
+        await runner.cleanup()
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default=f'http://127.0.0.1:{os.environ.get("WEBAPP_API_PORT", "8081")}')
+    parser.add_argument('--token', default=os.environ.get('BOT_TOKEN', ''), help='токен бота для подписи initData')
+    parser.add_argument('--local', action='store_true', help='поднять API в этом процессе на временной БД')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=0.0, help='пауза клиента между опросами, с')
+    parser.add_argument('--burst', type=int, default=0, help='нажатий в пачке для /api/actions (0 - не слать)')
+    args = parser.parse_args()
+
+    if args.local:
+        return asyncio.run(run_local(args))
+    return asyncio.run(load(args.url.rstrip('/'), args.token, args.users, args.seconds, args.interval, args.burst))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
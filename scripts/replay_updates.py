@@ -0,0 +1,103 @@
+"""
+Прогон записанных апдейтов через локальный вебхук
+
+Запусти бота с RUN_MODE=webhook (WEBHOOK_URL можно не задавать - тогда
+вебхук в Telegram не регистрируется) и отправь ему апдейты:
+
+    python scripts/replay_updates.py --file updates.jsonl
+    python scripts/replay_updates.py --users 50 --concurrency 20
+
+updates.jsonl - по одному Update (JSON от Telegram) в строке. Без --file
+апдейты генерируются: /start, главное меню и статистика от --users игроков.
+Печатает коды ответов, задержки и состояние /healthz.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+from urllib.parse import urljoin
+
+import aiohttp
+
+
+def synthetic_updates(users: int):
+    """Апдейты как от настоящих клиентов: сообщения и нажатия кнопок"""
+    ids = itertools.count(1)
+    now = int(time.time())
+    for user_id in range(1, users + 1):
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'Replay{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        for text in ('/start', '/stats'):
+            yield {
+                'update_id': next(ids),
+                'message': {'message_id': next(ids), 'date': now, 'chat': chat, 'from': user, 'text': text},
+            }
+        yield {
+            'update_id': next(ids),
+            'callback_query': {
+                'id': str(next(ids)), 'from': user, 'chat_instance': str(user_id), 'data': 'main_menu',
+                'message': {'message_id': next(ids), 'date': now, 'chat': chat, 'text': 'menu'},
+            },
+        }
+
+
+def recorded_updates(path: str):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def replay(url: str, secret: str, updates: list, concurrency: int):
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses, latencies = {}, []
+
+    async def post(session, update):
+        async with semaphore:
+            started = time.perf_counter()
+            async with session.post(url, json=update, headers=headers) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(post(session, update) for update in updates))
+        duration = time.perf_counter() - started
+
+        # /healthz - от корня сервера, какой бы длины ни был WEBHOOK_PATH
+        health_url = urljoin(url, '/healthz')
+        async with session.get(health_url) as response:
+            health = await response.json() if response.status == 200 else response.status
+
+    latencies.sort()
+    print(f'Отправлено {len(updates)} апдейтов за {duration:.2f} с ({len(updates) / duration:.0f}/с)')
+    print(f'Коды ответов: {statuses}')
+    print(f'Задержка: p50 {statistics.median(latencies) * 1000:.0f} мс, '
+          f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} мс, '
+          f'max {latencies[-1] * 1000:.0f} мс')
+    print(f'/healthz: {health}')
+    return 0 if set(statuses) == {200} else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    port = os.environ.get('WEBHOOK_PORT', '8080')
+    path = os.environ.get('WEBHOOK_PATH', '/webhook')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{port}{path}')
+    parser.add_argument('--secret', default=os.environ.get('WEBHOOK_SECRET', ''))
+    parser.add_argument('--file', help='JSONL с записанными апдейтами')
+    parser.add_argument('--users', type=int, default=20, help='игроков для сгенерированных апдейтов')
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+
+    updates = list(recorded_updates(args.file) if args.file else synthetic_updates(args.users))
+    return asyncio.run(replay(args.url, args.secret, updates, args.concurrency))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""
+Общая обвязка тестов
+
+Тесты импортируют код бота так же, как run.py (из каталога bot/), на
+временной БД. Движки БД - синглтоны модуля, поэтому все корутины тестов
+выполняются в одном event loop: фикстура run.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'tests.db')
+os.environ['RUN_MODE'] = 'polling'
+for key, value in {'BOT_TOKEN': '123456:test', 'LOG_LEVEL': 'WARNING', 'ADMIN_IDS': '1'}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture(scope='session')
+def run():
+    """run(coro) - выполнить корутину в общем event loop тестов"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+
+    from database.engine import close_db
+    loop.run_until_complete(close_db())
+    loop.close()
+
+
+@pytest.fixture(scope='session')
+def database(run):
+    """Схема из миграций (init_db) и справочник предметов"""
+    from database.catalog import reload_catalog
+    from database.engine import init_db
+    from database.init_data import add_starter_items
+
+    run(init_db())
+    run(add_starter_items())
+    run(reload_catalog())
@@ -0,0 +1,16 @@
+"""
+Горячие запросы идут по индексам (как scripts/check_query_plans.py, но в тестах)
+"""
+import pytest
+
+from database.diagnostics import HOT_QUERIES, assert_no_full_scan
+from database.engine import get_db
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_no_full_scan(run, database, name):
+    async def check():
+        async with get_db() as db:
+            await assert_no_full_scan(db, HOT_QUERIES[name])
+
+    run(check())
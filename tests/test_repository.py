@@ -0,0 +1,208 @@
+"""
+MemoryRepository ведёт себя так же, как SqlRepository
+
+Одна и та же случайная последовательность действий прогоняется на обоих
+хранилищах, после каждого шага сравниваются результаты, в конце - состояние
+игрока: баланс и журнал, статы и уровень питомца, инвентарь, навыки.
+Часы заморожены и двигаются действием advance, поэтому снижение статов
+по тикам одинаково в обоих прогонах.
+"""
+import contextlib
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm.attributes import flag_modified
+
+from database import activity, care, crud, decay, ledger, repository
+from database.catalog import get_catalog
+from database.engine import get_db
+from database.leveling import MAX_LEVEL
+from database.models import CurrencyLedger, Pet
+from database.repository import MemoryRepository, SqlRepository
+
+SEEDS = range(8)
+STEPS = 60
+SKILLS = ('jump', 'sing', 'dance')
+PET_FIELDS = (
+    'health', 'happiness', 'intelligence', 'energy', 'level', 'xp', 'evolution_stage', 'evolution_path',
+    'total_games_played', 'last_fed', 'last_played', 'last_sleep',
+)
+
+
+class FrozenClock(datetime):
+    """datetime.now() для модулей БД - время теста"""
+    current = datetime(2026, 1, 1, 12, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    for module in (crud, repository, decay, care, ledger, activity):
+        monkeypatch.setattr(module, 'datetime', FrozenClock)
+    FrozenClock.current = datetime(2026, 1, 1, 12, 0, 0)
+    return FrozenClock
+
+
+def memory_steps(repo):
+    @contextlib.asynccontextmanager
+    async def step():
+        yield repo
+    return step
+
+
+def sql_steps():
+    """Каждый шаг - своя сессия и commit, как апдейт в DbSessionMiddleware"""
+    @contextlib.asynccontextmanager
+    async def step():
+        async with get_db() as db:
+            yield SqlRepository(db)
+            await db.commit()
+    return step
+
+
+def random_actions(seed: int) -> list:
+    rng = random.Random(seed)
+    food = [item.id for item in get_catalog().of_type('food')]
+    actions = []
+    for _ in range(STEPS):
+        kind = rng.choice(('feed', 'play', 'rest', 'xp', 'currency', 'advance', 'grant', 'learn'))
+        if kind == 'xp':
+            actions.append(('xp', rng.choice((rng.randint(1, 200), rng.randint(10_000, 600_000)))))
+        elif kind == 'currency':
+            actions.append(('currency', rng.randint(-300, 200), rng.randint(-20, 10), rng.random() < 0.1))
+        elif kind == 'advance':
+            actions.append(('advance', rng.randint(1, 40 * 3600)))
+        elif kind in ('feed', 'grant'):
+            actions.append((kind, rng.choice(food)))
+        elif kind == 'learn':
+            actions.append(('learn', rng.choice(SKILLS)))
+        else:
+            actions.append((kind,))
+    return actions
+
+
+def _result(value):
+    """Сравнимый вид результата действия"""
+    if isinstance(value, dict):
+        return {key: _result(item) for key, item in value.items() if key not in ('pet', 'item', 'skill')}
+    if isinstance(value, tuple):
+        return tuple(value)
+    if isinstance(value, Pet):
+        return tuple(getattr(value, field) for field in PET_FIELDS)
+    return value
+
+
+async def play(step, clock, telegram_id: int, actions: list) -> list:
+    """Прогнать сценарий; возвращает результаты шагов и итоговое состояние"""
+    starter = {}
+    for name, quantity in crud.STARTER_ITEMS.items():
+        item = get_catalog().find(name)
+        if item:
+            starter[item.id] = quantity
+
+    async with step() as repo:
+        user = await repo.get_or_create_user(telegram_id, f'user{telegram_id}', 'Test')
+        pet = await repo.create_pet(user.id, 'Тест', 'cyber_cat', 'playful')
+        await repo.add_items_to_user(user.id, starter)
+        # Часы ухода - от замороженного времени, а не от default колонок.
+        # refresh_stats уже подставил stats_updated_at как сохранённое, поэтому
+        # без flag_modified совпадающее значение не попало бы в UPDATE
+        pet = await repo.get_pet_by_id(pet.id)
+        for field in ('created_at', 'last_fed', 'last_played', 'last_sleep', 'stats_updated_at'):
+            setattr(pet, field, clock.current)
+            flag_modified(pet, field)
+    user_id, pet_id = user.id, pet.id
+
+    results = []
+    for index, action in enumerate(actions):
+        random.seed(index)
+        kind = action[0]
+        if kind == 'advance':
+            clock.current += timedelta(seconds=action[1])
+            continue
+        async with step() as repo:
+            if kind == 'feed':
+                used = await repo.use_item(user_id, action[1])
+                fed = await repo.feed_pet(pet_id, used['item']) if used['success'] else None
+                result = (used['success'], _result(fed))
+            elif kind == 'play':
+                result = await repo.play_with_pet(pet_id)
+            elif kind == 'rest':
+                result = await repo.rest_pet(pet_id)
+            elif kind == 'xp':
+                result = await repo.add_pet_xp(pet_id, action[1])
+            elif kind == 'currency':
+                result = await repo.update_user_currency(
+                    user_id, coins=action[1], crystals=action[2], reason='test', allow_overdraft=action[3]
+                )
+            elif kind == 'grant':
+                result = await repo.add_items_to_user(user_id, {action[1]: 2})
+            else:
+                result = await repo.learn_skill(pet_id, action[1], 'trick')
+        results.append((action, _result(result)))
+
+    async with step() as repo:
+        user = await repo.get_or_create_user(telegram_id)
+        pets = await repo.get_user_pets(user_id)
+        state = {
+            'balance': (user.coins, user.crystals),
+            'pet': _result(pets[0]),
+            'inventory': [tuple(row) for row in await repo.get_inventory_rows(user_id)],
+            'skills': sorted((skill.skill_name, skill.skill_type) for skill in await repo.get_pet_skills(pet_id)),
+        }
+    return results, state
+
+
+async def sql_ledger(telegram_id: int):
+    """(записей, сумма монет, сумма кристаллов) в журнале игрока"""
+    async with get_db() as db:
+        user_id = (await crud.get_user(db, telegram_id)).id
+        row = (await db.execute(
+            select(func.count(), func.sum(CurrencyLedger.coins_delta), func.sum(CurrencyLedger.crystals_delta))
+            .where(CurrencyLedger.user_id == user_id)
+        )).one()
+    return tuple(row) if row[0] else (0, None, None)
+
+
+def memory_ledger(repo, telegram_id: int):
+    user_id = repo._users_by_telegram_id[telegram_id].id
+    rows = [row for row in repo.ledger if row['user_id'] == user_id]
+    if not rows:
+        return (0, None, None)
+    return len(rows), sum(row['coins_delta'] for row in rows), sum(row['crystals_delta'] for row in rows)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_memory_matches_sql(run, database, clock, seed):
+    actions = random_actions(seed)
+    telegram_id = 10_000 + seed
+    memory = MemoryRepository()
+
+    memory_results, memory_state = run(play(memory_steps(memory), clock, telegram_id, actions))
+    clock.current = datetime(2026, 1, 1, 12, 0, 0)
+    sql_results, sql_state = run(play(sql_steps(), clock, telegram_id, actions))
+
+    for memory_result, sql_result in zip(memory_results, sql_results):
+        assert memory_result == sql_result
+    assert memory_state == sql_state
+    assert memory_ledger(memory, telegram_id) == run(sql_ledger(telegram_id))
+    assert memory_state['pet'][PET_FIELDS.index('level')] <= MAX_LEVEL
+
+
+def test_scenarios_cover_the_rules(run, database, clock):
+    """Сценарии действительно упираются в MAX_LEVEL, овердрафт и тики снижения"""
+    memory = MemoryRepository()
+    levels, refused, decayed = set(), 0, 0
+    for seed in SEEDS:
+        results, state = run(play(memory_steps(memory), clock, 20_000 + seed, random_actions(seed)))
+        levels.add(state['pet'][PET_FIELDS.index('level')])
+        refused += sum(1 for action, result in results if action[0] == 'currency' and result is None)
+        decayed += state['pet'][PET_FIELDS.index('health')] < 100
+    assert MAX_LEVEL in levels
+    assert refused
+    assert decayed
@@ -0,0 +1,110 @@
+"""
+POST /api/actions: повтор пачки, чей ключ записали параллельно
+
+При нескольких пишущих соединениях два повтора одной пачки могут оба не
+найти ключ и оба применить действия; второй упирается в уникальный ключ.
+Тест воспроизводит это детерминированно: ключ записан другой сессией уже
+после того, как запрос прочитал сохранённые результаты.
+"""
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from config_reader import config
+from database import crud
+from database.engine import engine, get_db
+from database.models import WebAppAction
+from services import webapp_api
+
+TELEGRAM_ID = 30_001
+
+
+def init_data(telegram_id: int) -> str:
+    """initData, подписанная токеном бота, как её присылает Telegram"""
+    fields = {
+        'auth_date': str(int(time.time())),
+        'query_id': 'test',
+        'user': json.dumps({'id': telegram_id, 'first_name': 'Test'}),
+    }
+    check = '\n'.join(f'{key}={value}' for key, value in sorted(fields.items()))
+    secret = hmac.new(b'WebAppData', config.BOT_TOKEN.get_secret_value().encode(), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+async def create_player():
+    async with get_db() as db:
+        user = await crud.get_or_create_user(db, TELEGRAM_ID, 'test', 'Test')
+        pet = await crud.create_pet(db, user.id, 'Тест', 'cyber_cat', 'playful')
+        await db.commit()
+    return user.id, pet.id
+
+
+async def store_key(user_id: int, key: str, result: dict):
+    """Ключ, который только что закоммитил параллельный повтор
+
+    Через своё соединение - второй писатель, как при DB_WRITER_POOL_SIZE > 1.
+    """
+    writer = create_async_engine(engine.url)
+    try:
+        async with AsyncSession(writer) as db:
+            await crud.save_action_results(db, user_id, [
+                {'key': key, 'action': 'play', 'result': result, 'client_at': None},
+            ])
+            await db.commit()
+    finally:
+        await writer.dispose()
+
+
+async def games_played(pet_id: int) -> int:
+    async with get_db() as db:
+        return (await crud.get_pet_by_id(db, pet_id)).total_games_played
+
+
+async def stored_keys(user_id: int) -> int:
+    async with get_db() as db:
+        return await db.scalar(select(func.count()).where(WebAppAction.user_id == user_id))
+
+
+def test_concurrent_retry_is_replayed(run, database, monkeypatch):
+    user_id, pet_id = run(create_player())
+    stored = {'status': 'ok', 'from': 'concurrent retry'}
+    read_results = crud.get_action_results
+
+    async def racing_read(db, user_id, keys):
+        # Первое чтение пачки опережает параллельный повтор, он коммитит ключ
+        # сразу после него; дальше - обычное чтение
+        monkeypatch.setattr(crud, 'get_action_results', read_results)
+        done = await read_results(db, user_id, keys)
+        await store_key(user_id, 'play-1', stored)
+        return done
+
+    monkeypatch.setattr(crud, 'get_action_results', racing_read)
+    now = int(time.time() * 1000)
+    payload = {'actions': [
+        {'id': 'play-1', 'type': 'play', 'at': now},
+        {'id': 'rest-1', 'type': 'rest', 'at': now + 1},
+    ]}
+    games = run(games_played(pet_id))
+
+    async def post():
+        headers = {'Authorization': f'tma {init_data(TELEGRAM_ID)}'}
+        async with TestClient(TestServer(webapp_api.build_api())) as client:
+            response = await client.post('/actions', json=payload, headers=headers)
+            return response.status, await response.json()
+
+    status, body = run(post())
+
+    assert status == 200
+    results = {result['id']: result for result in body['results']}
+    assert results['play-1'] == {'id': 'play-1', **stored, 'replayed': True}
+    assert 'replayed' not in results['rest-1']
+    # Игра применена один раз - параллельным повтором, а не этим запросом
+    assert run(games_played(pet_id)) == games
+    assert run(stored_keys(user_id)) == 2
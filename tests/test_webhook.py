@@ -0,0 +1,86 @@
+"""
+Вебхук: записанные апдейты проходят через build_app без Telegram
+
+Приложение собирается как в run.py (bootstrap), только сессия бота -
+заглушка: запросы к Bot API записываются, а ответы строятся на месте.
+Апдейты из tests/data/updates.jsonl отправляются тем же кодом, что и в
+scripts/replay_updates.py.
+"""
+import os
+import sys
+from datetime import datetime
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+from aiogram.types import Chat, Message
+from aiohttp.test_utils import TestClient, TestServer
+from pydantic import SecretStr
+
+from config_reader import config
+from bootstrap import create_bot, create_dispatcher
+from services.webhook import HEALTH_PATH, build_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from replay_updates import recorded_updates  # noqa: E402
+
+UPDATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'updates.jsonl')
+SECRET = 'test-webhook-secret'
+
+
+class StubSession(BaseSession):
+    """Сессия бота без сети: запоминает методы и отвечает как Telegram"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls.append(method)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            chat = Chat(id=method.chat_id or 0, type='private')
+            return Message(message_id=len(self.calls), date=datetime.now(), chat=chat, text=method.text)
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b''
+
+    async def close(self):
+        pass
+
+
+def test_recorded_updates(run, database, monkeypatch):
+    monkeypatch.setattr(config, 'WEBHOOK_SECRET', SecretStr(SECRET))
+    updates = list(recorded_updates(UPDATES))
+    session = StubSession()
+    bot = create_bot(session)
+    app = build_app(create_dispatcher(), bot)
+
+    async def replay():
+        headers = {'X-Telegram-Bot-Api-Secret-Token': SECRET}
+        async with TestClient(TestServer(app)) as client:
+            statuses = []
+            for update in updates:
+                response = await client.post(config.WEBHOOK_PATH, json=update, headers=headers)
+                statuses.append(response.status)
+
+            forged = await client.post(config.WEBHOOK_PATH, json=updates[0])
+            health = await client.get(HEALTH_PATH)
+            return statuses, forged.status, health.status, await health.json()
+
+    statuses, forged, health_status, health = run(replay())
+
+    assert statuses == [200] * len(updates)
+    assert forged == 401
+    assert health_status == 200
+    assert health['handled'] == len(updates) + 1
+
+    # Каждый игрок из записи получил ответы, на каждое нажатие ответили.
+    # Напоминания питомцам из других тестов (care_notifier стартует вместе
+    # с приложением) уходят в другие чаты и здесь не считаются
+    players = {update['message']['chat']['id'] for update in updates if 'message' in update}
+    chats = {call.chat_id for call in session.calls if isinstance(call, (SendMessage, EditMessageText))}
+    assert players <= chats
+    answered = sum(isinstance(call, AnswerCallbackQuery) for call in session.calls)
+    assert answered == sum('callback_query' in update for update in updates)